@@ -0,0 +1,225 @@
+"""
+Бенчмарк EmotionAnalyzer.analyze с проверкой регрессий
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.analyzer_bench                    # замер и сравнение с эталоном
+    python -m benchmarks.analyzer_bench --update-baseline  # записать новый эталон
+
+Код возврата 1 — если результаты анализа разошлись с эталоном той же
+версии анализатора или задержка выросла больше допустимого порога.
+Время зависит от машины: эталон стоит записывать на той же машине,
+на которой проверяются регрессии.
+"""
+
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.corpus import CorpusGenerator
+from src.emotion_analyzer import EmotionAnalyzer
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Размер корпуса по умолчанию: класс длины → количество записей
+DEFAULT_COUNTS = {'tweet': 2000, 'note': 300, 'essay': 20}
+
+PERCENTILES = (50, 95, 99)
+
+# Метрики, по которым ищется регрессия (p99 на малом числе эссе шумит)
+CHECKED_METRICS = ('p50_ms', 'p95_ms')
+
+
+class UncachedAnalyzer(EmotionAnalyzer):
+    """Анализатор без кэша результатов: каждый вызов считает заново"""
+
+    MEMO_SIZE = 0
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def measure(analyzer: EmotionAnalyzer, texts: List[str], rounds: int) -> List[float]:
+    """
+    Время analyze() для каждого текста, секунды
+
+    Каждый текст анализируется rounds раз, берётся лучшее время:
+    так меньше влияют сборка мусора и соседние процессы.
+    """
+    best = [float('inf')] * len(texts)
+    clock = time.perf_counter
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for i, text in enumerate(texts):
+                start = clock()
+                analyzer.analyze(text)
+                elapsed = clock() - start
+                if elapsed < best[i]:
+                    best[i] = elapsed
+            gc.collect()
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def summarize(times: List[float], sizes: List[int]) -> Dict[str, float]:
+    """Перцентили задержки, записи в секунду и пропускная способность"""
+    ordered = sorted(times)
+    total = sum(times)
+    summary = {'count': len(times)}
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(percentile(ordered, percent) * 1000, 4)
+    summary['entries_per_sec'] = round(len(times) / total, 1) if total else 0.0
+    summary['kb_per_sec'] = round(sum(sizes) / 1024 / total, 1) if total else 0.0
+    return summary
+
+
+def result_digest(result: Dict) -> str:
+    """Короткий отпечаток результата analyze() для сравнения с эталоном"""
+    scores = ','.join(f"{emotion}={value!r}" for emotion, value in sorted(result['all_emotions'].items()))
+    data = f"{result['emotion']}|{result['score']!r}|{scores}"
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def run(seed: int, counts: Dict[str, int], rounds: int, stemming: bool) -> Dict:
+    """Замер на корпусе; результат — отчёт в формате эталона"""
+    entries = CorpusGenerator(seed).corpus(counts)
+    analyzer = UncachedAnalyzer(stemming=stemming)
+
+    # Прогрев: ленивые структуры и кэши интерпретатора
+    warmup = CorpusGenerator(seed + 1).corpus({'tweet': 50, 'note': 5})
+    for _, _, text in warmup:
+        analyzer.analyze(text)
+
+    texts = [text for _, _, text in entries]
+    times = measure(analyzer, texts, rounds)
+    digests = [result_digest(analyzer.analyze(text)) for text in texts]
+
+    timing = {}
+    for size_class in counts:
+        indices = [i for i, (c, _, _) in enumerate(entries) if c == size_class]
+        timing[size_class] = summarize([times[i] for i in indices],
+                                       [len(texts[i].encode('utf-8')) for i in indices])
+    timing['all'] = summarize(times, [len(t.encode('utf-8')) for t in texts])
+
+    return {
+        'version': analyzer.version,
+        'corpus': {'seed': seed, 'counts': counts, 'stemming': stemming},
+        'machine': f"{platform.python_implementation()} {platform.python_version()} "
+                   f"{platform.machine()}",
+        'timing': timing,
+        'results': digests,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Сравнение отчёта с эталоном
+
+    Returns:
+        (регрессии, замечания); регрессии — расхождения результатов при
+        той же версии анализатора и рост задержки больше threshold
+    """
+    problems = []
+    notes = []
+    if report['corpus'] != baseline.get('corpus'):
+        notes.append("Корпус отличается от эталонного — сравнение пропущено")
+        return problems, notes
+
+    mismatched = [i for i, (a, b) in enumerate(zip(report['results'], baseline['results'])) if a != b]
+    if mismatched:
+        message = f"Результаты разошлись с эталоном на {len(mismatched)} записях (первые: {mismatched[:10]})"
+        if report['version'] == baseline.get('version'):
+            problems.append(message)
+        else:
+            notes.append(f"{message}; версия анализатора изменилась — обновите эталон")
+
+    for size_class, current in report['timing'].items():
+        reference = baseline['timing'].get(size_class)
+        if not reference:
+            continue
+        for metric in CHECKED_METRICS:
+            if reference[metric] and current[metric] > reference[metric] * (1 + threshold):
+                problems.append(
+                    f"{size_class}: {metric} {current[metric]:.3f} > эталон {reference[metric]:.3f} "
+                    f"(+{(current[metric] / reference[metric] - 1) * 100:.0f}%)"
+                )
+    return problems, notes
+
+
+def print_report(report: Dict, baseline: Optional[Dict]):
+    """Таблица замеров (и эталона, если есть)"""
+    print(f"Анализатор {report['version']}, {report['machine']}")
+    header = f"{'класс':<8}{'записей':>9}{'p50, мс':>11}{'p95, мс':>11}{'p99, мс':>11}{'записей/с':>12}{'КБ/с':>10}"
+    print(header)
+    for size_class, summary in report['timing'].items():
+        print(f"{size_class:<8}{summary['count']:>9}{summary['p50_ms']:>11.3f}{summary['p95_ms']:>11.3f}"
+              f"{summary['p99_ms']:>11.3f}{summary['entries_per_sec']:>12.1f}{summary['kb_per_sec']:>10.1f}")
+        reference = (baseline or {}).get('timing', {}).get(size_class)
+        if reference:
+            print(f"{'  эталон':<17}{reference['p50_ms']:>11.3f}{reference['p95_ms']:>11.3f}"
+                  f"{reference['p99_ms']:>11.3f}{reference['entries_per_sec']:>12.1f}"
+                  f"{reference['kb_per_sec']:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(description="Бенчмарк EmotionAnalyzer.analyze")
+    parser.add_argument("--seed", type=int, default=0, help="зерно корпуса")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="множитель размера корпуса (для быстрой проверки — 0.1)")
+    parser.add_argument("--rounds", type=int, default=5, help="повторов замера на запись")
+    parser.add_argument("--no-stemming", action="store_true", help="без поиска по основам")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="допустимый рост задержки (0.5 = +50%%)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="файл эталона")
+    parser.add_argument("--update-baseline", action="store_true", help="записать отчёт как эталон")
+    args = parser.parse_args(argv)
+
+    counts = {size_class: max(1, round(count * args.scale)) for size_class, count in DEFAULT_COUNTS.items()}
+    report = run(args.seed, counts, args.rounds, not args.no_stemming)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        print(f"Эталон записан: {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("Эталона нет — запустите с --update-baseline")
+        return 0
+
+    problems, notes = compare(report, baseline, args.threshold)
+    for note in notes:
+        print(f"Замечание: {note}")
+    for problem in problems:
+        print(f"РЕГРЕССИЯ: {problem}")
+    if not problems:
+        print("Регрессий нет")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Синтетический корпус записей дневника для бенчмарков
+"""
+
+import random
+import re
+from typing import Dict, List, Tuple
+
+from src.emotion_analyzer import EmotionAnalyzer
+
+
+class CorpusGenerator:
+    """
+    Генератор записей на русском и английском из словаря анализатора
+
+    Записи собираются из предложений: нейтральные слова вперемешку со
+    словами эмоций, интенсификаторами и отрицаниями перед ними,
+    знаками препинания и эмодзи. Одно и то же зерно даёт один и тот же
+    корпус, поэтому результаты анализа можно сравнивать между запусками.
+    """
+
+    # Размер записи в байтах UTF-8: от твита до эссе на 50 КБ
+    SIZE_CLASSES = {
+        'tweet': (40, 280),
+        'note': (500, 3000),
+        'essay': (10_000, 50_000),
+    }
+
+    LANGUAGES = ('ru', 'en')
+
+    # Нейтральные слова, которых нет в словаре
+    FILLER = {
+        'ru': [
+            'сегодня', 'утром', 'вечером', 'работа', 'дом', 'друг', 'мама',
+            'встреча', 'погода', 'город', 'книга', 'проект', 'кофе', 'поезд',
+            'потом', 'снова', 'было', 'стало', 'думаю', 'кажется', 'опять',
+            'ещё', 'всё', 'день', 'неделя', 'звонок', 'письмо', 'ёлка',
+            'я', 'мы', 'он', 'она', 'и', 'а', 'но', 'в', 'на', 'с', 'по', 'что',
+        ],
+        'en': [
+            'today', 'morning', 'evening', 'work', 'home', 'friend', 'mom',
+            'meeting', 'weather', 'city', 'book', 'project', 'coffee', 'train',
+            'then', 'again', 'was', 'felt', 'think', 'seems', 'still',
+            'all', 'day', 'week', 'call', 'letter',
+            'i', 'we', 'he', 'she', 'and', 'but', 'in', 'on', 'with', 'that',
+        ],
+    }
+
+    EMOJI = ['🙂', '😢', '😠', '😰', '😮', '😌', '❤️', '🔥']
+    SENTENCE_ENDS = ['.', '.', '.', '!', '?', '…', '!!']
+
+    CYRILLIC_RE = re.compile(r'[а-яё]')
+
+    def __init__(self, seed: int = 0, analyzer_class: type = EmotionAnalyzer):
+        """
+        Args:
+            seed: зерно генератора случайных чисел
+            analyzer_class: класс анализатора, чей словарь используется
+        """
+        self.seed = seed
+        self._random = random.Random(seed)
+        self.emotion_words = {language: [] for language in self.LANGUAGES}
+        for data in analyzer_class.EMOTION_WORDS.values():
+            for word in data['words']:
+                self.emotion_words[self._language(word)].append(word)
+        self.intensifiers = self._by_language(analyzer_class.INTENSIFIERS)
+        self.negations = self._by_language(analyzer_class.NEGATIONS)
+
+    def _language(self, word: str) -> str:
+        """Язык слова словаря"""
+        return 'ru' if self.CYRILLIC_RE.search(word) else 'en'
+
+    def _by_language(self, words) -> Dict[str, List[str]]:
+        """Слова словаря по языкам"""
+        result = {language: [] for language in self.LANGUAGES}
+        for word in words:
+            result[self._language(word)].append(word)
+        return result
+
+    def sentence(self, language: str) -> str:
+        """Одно предложение"""
+        rnd = self._random
+        words = []
+        for _ in range(rnd.randint(4, 16)):
+            roll = rnd.random()
+            if roll < 0.6:
+                words.append(rnd.choice(self.FILLER[language]))
+                continue
+            if roll < 0.7:
+                words.append(rnd.choice(self.intensifiers[language]))
+            elif roll < 0.78:
+                words.append(rnd.choice(self.negations[language]))
+            word = rnd.choice(self.emotion_words[language])
+            # Регистр и ё/е как в живом тексте
+            if rnd.random() < 0.1:
+                word = word.upper()
+            if rnd.random() < 0.1:
+                word = word.replace('ё', 'е')
+            words.append(word)
+            if rnd.random() < 0.15:
+                words[-1] += ','
+
+        if rnd.random() < 0.1:
+            words.append(rnd.choice(self.EMOJI))
+        text = ' '.join(words)
+        return text[0].upper() + text[1:] + rnd.choice(self.SENTENCE_ENDS)
+
+    def entry(self, size_class: str, language: str) -> str:
+        """Запись размера из диапазона size_class"""
+        rnd = self._random
+        low, high = self.SIZE_CLASSES[size_class]
+        target = rnd.randint(low, high)
+
+        parts = []
+        length = 0
+        while True:
+            sentence = self.sentence(language)
+            size = len(sentence.encode('utf-8'))
+            if length and length + size + 2 > target:
+                break
+            separator = ('\n\n' if rnd.random() < 0.1 else ' ') if parts else ''
+            parts.append(separator + sentence)
+            length += len(separator) + size
+        return ''.join(parts)
+
+    def corpus(self, counts: Dict[str, int]) -> List[Tuple[str, str, str]]:
+        """
+        Корпус записей
+
+        Args:
+            counts: класс длины → количество записей (языки поровну)
+
+        Returns:
+            Список (класс длины, язык, текст)
+        """
+        entries = []
+        for size_class, count in counts.items():
+            for i in range(count):
+                language = self.LANGUAGES[i % len(self.LANGUAGES)]
+                entries.append((size_class, language, self.entry(size_class, language)))
+        return entries
@@ -0,0 +1,373 @@
+"""
+Дифференциальная проверка движков анализа эмоций
+
+Эталон — исходный анализ на регулярных выражениях, замороженный здесь
+копией (ReferenceAnalyzer). Каждый зарегистрированный движок считает
+те же тексты, что и эталон: записи синтетического корпуса и случаи,
+собранные под конкретные свойства (отрицания, интенсификаторы,
+регистр, ё/е, пунктуация, слова внутри слов, фразы). Расхождение в
+эмоции или в оценках больше допуска — ошибка; входной текст
+расхождения сокращается до минимального, на котором оно остаётся.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.differential
+    python -m benchmarks.differential --engine vector --cases 5000 --report divergences.json
+
+Код возврата 1 — если найдено хотя бы одно расхождение.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import CorpusGenerator
+from src.emotion_analyzer import EmotionAnalyzer, IncrementalAnalyzer
+
+
+class ReferenceAnalyzer:
+    """
+    Эталон: анализ на регулярных выражениях
+
+    Код заморожен и не должен меняться вместе с анализатором — любое
+    изменение правил подсчёта в EmotionAnalyzer проверяется против него.
+    Для каждой эмоции текст проходится отдельной регуляркой, для каждого
+    найденного слова отдельно ищутся интенсификатор и отрицание.
+    Словарь — встроенный словарь EmotionAnalyzer, без основ.
+    """
+
+    def __init__(self, analyzer_class: type = EmotionAnalyzer):
+        self.emotion_words = {e: list(data['words']) for e, data in analyzer_class.EMOTION_WORDS.items()}
+        self.intensifiers = dict(analyzer_class.INTENSIFIERS)
+        self.negations = list(analyzer_class.NEGATIONS)
+
+        self.emotion_patterns = {}
+        for emotion, words in self.emotion_words.items():
+            pattern = r'\b(' + '|'.join(re.escape(w) for w in words) + r')\b'
+            self.emotion_patterns[emotion] = re.compile(pattern, re.IGNORECASE)
+
+    def analyze(self, text: str) -> Dict[str, any]:
+        """Анализ текста: emotion, score, all_emotions"""
+        if not text or not text.strip():
+            return {
+                'emotion': 'calm',
+                'score': 0.5,
+                'all_emotions': {e: 0.0 for e in self.emotion_words},
+            }
+
+        text_lower = text.lower()
+        emotion_scores = {emotion: 0.0 for emotion in self.emotion_words}
+
+        for emotion, pattern in self.emotion_patterns.items():
+            for match in pattern.findall(text_lower):
+                score = 1.0
+
+                # Интенсификатор ближе 20 символов перед словом
+                for intensifier, multiplier in self.intensifiers.items():
+                    if intensifier in text_lower:
+                        int_pos = text_lower.find(intensifier)
+                        word_pos = text_lower.find(match.lower())
+                        if 0 < word_pos - int_pos < 20:
+                            score *= multiplier
+                            break
+
+                # Отрицание инвертирует эмоцию
+                for negation in self.negations:
+                    neg_pattern = rf'\b{negation}\s+\w*\s*{re.escape(match)}'
+                    if re.search(neg_pattern, text_lower):
+                        score *= -0.5
+                        break
+
+                emotion_scores[emotion] += score
+
+        total = sum(abs(s) for s in emotion_scores.values())
+        if total > 0:
+            for emotion in emotion_scores:
+                emotion_scores[emotion] = max(0, emotion_scores[emotion] / total)
+
+        if total == 0:
+            dominant_emotion = 'calm'
+            dominant_score = 0.5
+        else:
+            dominant_emotion = max(emotion_scores, key=emotion_scores.get)
+            dominant_score = min(1.0, emotion_scores[dominant_emotion] * 2)
+
+        if dominant_score < 0.2:
+            dominant_emotion = 'calm'
+            dominant_score = 0.5
+
+        return {'emotion': dominant_emotion, 'score': dominant_score, 'all_emotions': emotion_scores}
+
+
+# ===== Движки =====
+
+# Имя → фабрика движка; движок получает список текстов и возвращает
+# список результатов (dict с all_emotions, а также emotion и score,
+# если движок их считает)
+ENGINES: Dict[str, Callable[[], Callable[[List[str]], List[Dict]]]] = {}
+
+
+def register_engine(name: str):
+    """Декоратор: регистрация фабрики движка под именем name"""
+    def decorator(factory):
+        ENGINES[name] = factory
+        return factory
+    return decorator
+
+
+@register_engine('analyze')
+def _analyze_engine():
+    analyzer = EmotionAnalyzer()
+    return lambda texts: [analyzer.analyze(text) for text in texts]
+
+
+@register_engine('incremental')
+def _incremental_engine():
+    live = IncrementalAnalyzer(EmotionAnalyzer())
+    return lambda texts: [live.analyze(text) for text in texts]
+
+
+@register_engine('vector')
+def _vector_engine():
+    from src.vector_scorer import VectorScorer
+
+    scorer = VectorScorer(EmotionAnalyzer())
+
+    def run(texts):
+        scores = scorer.score(texts)
+        return [{'all_emotions': dict(zip(scorer.emotions, row.tolist()))} for row in scores]
+    return run
+
+
+# ===== Входные данные =====
+
+class PropertyCases:
+    """
+    Случаи под отдельные свойства анализа
+
+    Случай — список фрагментов, текст — их склейка; по фрагментам
+    расхождение сокращается (shrink).
+    """
+
+    FILLER = ['день', 'и', 'я', 'был', 'ничего', 'себе', 'верю', 'the', 'a', 'was', 'ёлка', 'елка']
+    SPACES = [' ', ' ', ' ', '  ', '\n', '\t', ' ']
+    PUNCTUATION = [',', '.', '!', '?', '…', '-', '—', "'", '"', '(', ')', ':', '_']
+    AFFIXES = ['а', 'ы', 'ого', 'супер', 'не', 's', 'ing', 'un', '_']
+
+    PROPERTIES = ('negation', 'intensifier', 'case', 'yo', 'punctuation', 'embedded', 'phrase', 'mixed')
+
+    def __init__(self, seed: int = 0, analyzer_class: type = EmotionAnalyzer):
+        self._random = random.Random(seed)
+        self.emotion_words = [w for data in analyzer_class.EMOTION_WORDS.values() for w in data['words']]
+        self.phrases = [w for w in self.emotion_words if ' ' in w]
+        self.intensifiers = list(analyzer_class.INTENSIFIERS)
+        self.negations = list(analyzer_class.NEGATIONS)
+
+    def generate(self, count: int) -> List[Tuple[str, List[str]]]:
+        """count случаев (свойство, фрагменты), свойства по кругу"""
+        return [self.case(self.PROPERTIES[i % len(self.PROPERTIES)]) for i in range(count)]
+
+    def case(self, prop: str) -> Tuple[str, List[str]]:
+        """Один случай для свойства prop"""
+        rnd = self._random
+        parts = []
+        for _ in range(rnd.randint(1, 4)):
+            parts.extend(getattr(self, f"_{prop}")())
+            parts.append(rnd.choice(self.SPACES))
+        return prop, parts
+
+    def _space(self) -> str:
+        return self._random.choice(self.SPACES)
+
+    def _word(self) -> str:
+        return self._random.choice(self.emotion_words)
+
+    def _negation(self) -> List[str]:
+        # Отрицание, 0–2 слова между ним и словом эмоции
+        rnd = self._random
+        parts = [rnd.choice(self.negations), self._space()]
+        for _ in range(rnd.randint(0, 2)):
+            parts += [rnd.choice(self.FILLER + self.emotion_words), self._space()]
+        return parts + [self._word()]
+
+    def _intensifier(self) -> List[str]:
+        # Интенсификатор на разном расстоянии (граница — 20 символов)
+        rnd = self._random
+        parts = [rnd.choice(self.intensifiers)]
+        gap = rnd.choice([0, 1, 5, 10, 15, 18, 19, 20, 21, 25])
+        filler = ''
+        while len(filler) < gap:
+            filler += rnd.choice(self.FILLER) + ' '
+        return parts + [' ', filler[:gap], self._word()]
+
+    def _case(self) -> List[str]:
+        rnd = self._random
+        word = self._word()
+        return [''.join(ch.upper() if rnd.random() < 0.5 else ch for ch in word)]
+
+    def _yo(self) -> List[str]:
+        rnd = self._random
+        word = self._word()
+        if 'ё' in word:
+            word = word.replace('ё', 'е')
+        elif 'е' in word and rnd.random() < 0.5:
+            word = word.replace('е', 'ё', 1)
+        if rnd.random() < 0.3:
+            word = word.upper()
+        return [word]
+
+    def _punctuation(self) -> List[str]:
+        rnd = self._random
+        parts = []
+        if rnd.random() < 0.5:
+            parts.append(rnd.choice(self.PUNCTUATION))
+        parts.append(rnd.choice([self._word(), rnd.choice(self.negations), rnd.choice(self.intensifiers)]))
+        if rnd.random() < 0.7:
+            parts.append(rnd.choice(self.PUNCTUATION))
+        return parts
+
+    def _embedded(self) -> List[str]:
+        # Слово словаря внутри другого слова
+        rnd = self._random
+        word = self._word()
+        if rnd.random() < 0.5:
+            return [rnd.choice(self.AFFIXES), word]
+        return [word, rnd.choice(self.AFFIXES)]
+
+    def _phrase(self) -> List[str]:
+        # Фразы из нескольких слов с разными пробелами
+        rnd = self._random
+        phrase = rnd.choice(self.phrases + ['a bit', 'чуть-чуть'])
+        return [self._space().join(phrase.split(' '))]
+
+    def _mixed(self) -> List[str]:
+        rnd = self._random
+        prop = rnd.choice(self.PROPERTIES[:-1])
+        return getattr(self, f"_{prop}")()
+
+
+# ===== Сравнение =====
+
+def differences(expected: Dict, actual: Dict, tolerance: float) -> List[str]:
+    """Поля результата движка, разошедшиеся с эталоном"""
+    found = []
+    if 'emotion' in actual and actual['emotion'] != expected['emotion']:
+        found.append(f"emotion: {actual['emotion']} != {expected['emotion']}")
+    if 'score' in actual and not _close(actual['score'], expected['score'], tolerance):
+        found.append(f"score: {actual['score']!r} != {expected['score']!r}")
+    for emotion, value in expected['all_emotions'].items():
+        other = actual['all_emotions'].get(emotion)
+        if other is None or not _close(other, value, tolerance):
+            found.append(f"{emotion}: {other!r} != {value!r}")
+    return found
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    return not math.isnan(a) and abs(a - b) <= tolerance
+
+
+def shrink(parts: List[str], diverges: Callable[[str], bool]) -> str:
+    """
+    Сокращение случая: куски фрагментов удаляются, пока расхождение
+    остаётся; размер куска уменьшается вдвое, до одного фрагмента
+    """
+    chunk = max(1, len(parts) // 2)
+    while True:
+        i = 0
+        while i < len(parts):
+            candidate = parts[:i] + parts[i + chunk:]
+            if candidate and diverges(''.join(candidate)):
+                parts = candidate
+            else:
+                i += chunk
+        if chunk == 1:
+            return ''.join(parts)
+        chunk //= 2
+
+
+def run(engine_names: List[str], seed: int, cases: int, corpus_size: int,
+        tolerance: float, shrink_limit: int = 50) -> List[Dict]:
+    """
+    Прогон движков против эталона
+
+    Returns:
+        Список расхождений: engine, source (свойство или класс корпуса),
+        text, fields, minimal (сокращённый текст или None) и
+        minimal_fields (расхождения на нём)
+    """
+    reference = ReferenceAnalyzer()
+
+    inputs = []
+    half = corpus_size // 2
+    for size_class, _, text in CorpusGenerator(seed).corpus({'tweet': corpus_size - half, 'note': half}):
+        inputs.append((f"corpus:{size_class}", re.findall(r'\S+|\s+', text)))
+    inputs += PropertyCases(seed).generate(cases)
+
+    texts = [''.join(parts) for _, parts in inputs]
+    expected = [reference.analyze(text) for text in texts]
+
+    divergences = []
+    for name in engine_names:
+        engine = ENGINES[name]()
+        for (source, parts), text, reference_result, result in zip(inputs, texts, expected, engine(texts)):
+            fields = differences(reference_result, result, tolerance)
+            if not fields:
+                continue
+
+            def diverges(candidate: str) -> List[str]:
+                return differences(reference.analyze(candidate), engine([candidate])[0], tolerance)
+
+            minimal = minimal_fields = None
+            if len(divergences) < shrink_limit:
+                minimal = shrink(list(parts), lambda candidate: bool(diverges(candidate)))
+                minimal_fields = diverges(minimal)
+            divergences.append({
+                'engine': name, 'source': source, 'text': text, 'fields': fields,
+                'minimal': minimal, 'minimal_fields': minimal_fields,
+            })
+    return divergences
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(description="Сравнение движков анализа с эталоном")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                        help="движок (можно несколько; по умолчанию все)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генераторов")
+    parser.add_argument("--cases", type=int, default=4000, help="случаев под свойства")
+    parser.add_argument("--corpus", type=int, default=400, help="записей синтетического корпуса")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="допуск по оценкам")
+    parser.add_argument("--show", type=int, default=20, help="сколько расхождений напечатать")
+    parser.add_argument("--report", help="файл JSON со всеми расхождениями")
+    args = parser.parse_args(argv)
+
+    engine_names = args.engine or list(ENGINES)
+    divergences = run(engine_names, args.seed, args.cases, args.corpus, args.tolerance)
+
+    total = args.cases + args.corpus
+    for name in engine_names:
+        count = sum(1 for d in divergences if d['engine'] == name)
+        print(f"{name:<12} текстов {total}, расхождений {count}")
+
+    for divergence in divergences[:args.show]:
+        text, fields = divergence['text'], divergence['fields']
+        if divergence['minimal'] is not None:
+            text, fields = divergence['minimal'], divergence['minimal_fields']
+        print(f"\n[{divergence['engine']}] {divergence['source']}: {text[:200]!r}")
+        for field in fields:
+            print(f"    {field}")
+    if len(divergences) > args.show:
+        print(f"\n... и ещё {len(divergences) - args.show}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(divergences, f, ensure_ascii=False, indent=1)
+    return 1 if divergences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
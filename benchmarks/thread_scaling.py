@@ -0,0 +1,125 @@
+"""
+Масштабирование EmotionAnalyzer.analyze по потокам
+
+Один общий анализатор, корпус делится поровну между потоками пула.
+Печатаются записи в секунду и ускорение относительно одного потока,
+а результаты сверяются с однопоточным прогоном. На обычном CPython
+потоки упираются в GIL и ускорения почти нет; на сборке без GIL
+(python3.13t и новее) пропускная способность растёт с числом ядер.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.thread_scaling
+    python3.13t -m benchmarks.thread_scaling --threads 1 2 4 8 16
+"""
+
+import argparse
+import os
+import platform
+import sys
+import sysconfig
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.analyzer_bench import UncachedAnalyzer, result_digest
+from benchmarks.corpus import CorpusGenerator
+from src.emotion_analyzer import EmotionAnalyzer
+
+
+def build_info() -> str:
+    """Сборка интерпретатора и состояние GIL"""
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    gil_check = getattr(sys, "_is_gil_enabled", None)
+    gil = "включён" if gil_check is None or gil_check() else "выключен"
+    build = "без GIL (free-threaded)" if free_threaded else "обычная"
+    return (f"{platform.python_implementation()} {platform.python_version()}, сборка {build}, "
+            f"GIL {gil}, ядер {os.cpu_count()}")
+
+
+def run_threads(analyzer: EmotionAnalyzer, texts: List[str], threads: int) -> tuple:
+    """
+    Анализ texts в threads потоках
+
+    Returns:
+        (время в секундах, отпечатки результатов в порядке texts)
+    """
+    size = -(-len(texts) // threads)
+    slices = [texts[i:i + size] for i in range(0, len(texts), size)]
+    # Потоки стартуют одновременно: время создания пула не в счёт
+    barrier = threading.Barrier(len(slices) + 1)
+
+    def work(part: List[str]) -> List[str]:
+        barrier.wait()
+        return [result_digest(analyzer.analyze(text)) for text in part]
+
+    with ThreadPoolExecutor(max_workers=len(slices)) as pool:
+        futures = [pool.submit(work, part) for part in slices]
+        barrier.wait()
+        start = time.perf_counter()
+        digests = [digest for future in futures for digest in future.result()]
+        elapsed = time.perf_counter() - start
+    return elapsed, digests
+
+
+def measure(thread_counts: List[int], seed: int, counts: Dict[str, int], rounds: int,
+            stemming: bool) -> List[Dict]:
+    """Замеры по числу потоков (лучший из rounds прогонов)"""
+    texts = [text for _, _, text in CorpusGenerator(seed).corpus(counts)]
+    analyzer = UncachedAnalyzer(stemming=stemming)
+    reference = [result_digest(analyzer.analyze(text)) for text in texts]
+
+    rows = []
+    for threads in thread_counts:
+        best = float('inf')
+        for _ in range(rounds):
+            elapsed, digests = run_threads(analyzer, texts, threads)
+            if digests != reference:
+                raise RuntimeError(f"{threads} потоков: результаты отличаются от однопоточных")
+            best = min(best, elapsed)
+        rows.append({'threads': threads, 'seconds': best, 'entries_per_sec': len(texts) / best})
+
+    base = rows[0]['entries_per_sec']
+    for row in rows:
+        row['speedup'] = row['entries_per_sec'] / base
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(description="Масштабирование analyze по потокам")
+    parser.add_argument("--threads", type=int, nargs="+",
+                        help="числа потоков (по умолчанию 1, 2, 4, ... до числа ядер)")
+    parser.add_argument("--seed", type=int, default=0, help="зерно корпуса")
+    parser.add_argument("--entries", type=int, default=2000, help="записей в корпусе")
+    parser.add_argument("--rounds", type=int, default=3, help="прогонов на каждое число потоков")
+    parser.add_argument("--no-stemming", action="store_true", help="без поиска по основам")
+    args = parser.parse_args(argv)
+
+    thread_counts = args.threads
+    if not thread_counts:
+        cores = os.cpu_count() or 1
+        thread_counts = [1]
+        while thread_counts[-1] * 2 <= max(cores, 4):
+            thread_counts.append(thread_counts[-1] * 2)
+
+    # Твиты и заметки в пропорции дневника
+    counts = {'tweet': args.entries * 9 // 10, 'note': args.entries - args.entries * 9 // 10}
+    print(build_info())
+    try:
+        rows = measure(thread_counts, args.seed, counts, args.rounds, not args.no_stemming)
+    except RuntimeError as e:
+        print(f"ОШИБКА: {e}")
+        return 1
+
+    print(f"{'потоков':>8}{'время, с':>11}{'записей/с':>12}{'ускорение':>11}")
+    for row in rows:
+        print(f"{row['threads']:>8}{row['seconds']:>11.3f}{row['entries_per_sec']:>12.1f}"
+              f"{row['speedup']:>10.2f}x")
+    print("Результаты во всех потоках совпадают с однопоточными")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
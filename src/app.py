@@ -5,6 +5,7 @@
 import customtkinter as ctk
 from src.database import Database
 from src.emotion_analyzer import EmotionAnalyzer
+from src.lexicon import Lexicon
 from src.charts import ChartGenerator
 from ui.main_window import MainWindow
 
@@ -12,23 +13,61 @@ from ui.main_window import MainWindow
 class MoodJournalApp:
     """Главный класс приложения"""
 
+    # Языковые и пользовательский словари; рядом кэш скомпилированного
+    LEXICON_DIR = "data/lexicons"
+    # Период проверки изменений файлов словарей (мс)
+    LEXICON_CHECK_MS = 5000
+
     def __init__(self):
         """Инициализация приложения"""
-        # Настройка темы
-        ctk.set_appearance_mode("dark")
-        ctk.set_default_color_theme("blue")
-
         # Инициализация компонентов
         self.db = Database()
-        self.analyzer = EmotionAnalyzer()
-        self.charts = ChartGenerator(dark_mode=True)
+        # Режим надёжности записи хранится в настройках
+        self._apply_durability("durability", self.db.get_setting("durability", "full"))
+        self.db.add_setting_listener(self._apply_durability, "durability")
+        # Словоформы распознаются по основам. Словарь из файлов обычно
+        # берётся из кэша; если файлы некорректны, стартуем со встроенным,
+        # а _watch_lexicons повторит загрузку в фоне
+        paths = Lexicon.discover(self.LEXICON_DIR)
+        snapshot = Lexicon.snapshot(paths)
+        try:
+            self.analyzer = EmotionAnalyzer(stemming=True, lexicon_paths=paths,
+                                            cache_dir=self.LEXICON_DIR)
+            self._lexicon_snapshot = snapshot
+        except (OSError, ValueError):
+            self.analyzer = EmotionAnalyzer(stemming=True, cache_dir=self.LEXICON_DIR)
+            self._lexicon_snapshot = ()
+
+        # Настройка темы (сохранённая в настройках)
+        theme = self.db.get_setting("theme", "dark")
+        ctk.set_appearance_mode(theme)
+        ctk.set_default_color_theme("blue")
+
+        self.charts = ChartGenerator(dark_mode=theme == "dark")
 
         # Создание главного окна
         self.window = MainWindow(self.db, self.analyzer, self.charts)
 
+    def _apply_durability(self, _key: str, value: str):
+        """Применение настройки 'durability' (неизвестное значение — 'full')"""
+        self.db.set_durability(value if value in Database.DURABILITY_MODES else "full")
+
+    def _watch_lexicons(self):
+        """Перезагрузка словаря в фоне, если файлы словарей изменились"""
+        paths = Lexicon.discover(self.LEXICON_DIR)
+        snapshot = Lexicon.snapshot(paths)
+        if snapshot != self._lexicon_snapshot:
+            self._lexicon_snapshot = snapshot
+            self.analyzer.reload_lexicon(paths, background=True)
+        self.window.after(self.LEXICON_CHECK_MS, self._watch_lexicons)
+
     def run(self):
         """Запуск приложения"""
+        self._watch_lexicons()
         self.window.mainloop()
 
+        # Фоновые потоки не должны работать с закрытой БД
+        self.window.analysis_scheduler.close()
+        self.window.background_job.shutdown()
         # Закрываем БД при выходе
         self.db.close()
\ No newline at end of file
@@ -4,93 +4,619 @@
 
 import sqlite3
 import os
-from datetime import datetime, date
-from typing import Optional, List, Dict, Any
+import re
+import gzip
+import time
+import queue
+import bisect
+import pathlib
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Iterable, Callable
 import json
 
+from src.utils import parse_tags, content_hash
+
+
+class EntryPreview:
+    """
+    Компактная запись для списков: поля записи и начало текста
+
+    Полный текст не загружается — его получают через
+    Database.get_entry() при открытии записи. Поддерживает доступ
+    по ключу (entry['emotion']), как и словари из остальных методов.
+    """
+
+    __slots__ = ('id', 'date', 'time', 'emotion', 'emotion_score', 'tags', 'preview')
+
+    def __init__(self, id: int, date: str, time: str, emotion: str,
+                 emotion_score: float, tags: str, preview: str):
+        self.id = id
+        self.date = date
+        self.time = time
+        self.emotion = emotion
+        self.emotion_score = emotion_score
+        self.tags = tags
+        self.preview = preview
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'EntryPreview':
+        """Создание из строки выборки с колонками PREVIEW_COLUMNS"""
+        return cls(row['id'], row['date'], row['time'], row['emotion'],
+                   row['emotion_score'], row['tags'], row['preview'])
+
+    def __getitem__(self, key: str):
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        return f"EntryPreview(id={self.id}, date={self.date!r}, emotion={self.emotion!r})"
+
 
 class Database:
-    """Класс для управления базой данных дневника"""
+    """
+    Класс для управления базой данных дневника
+
+    БД работает в режиме WAL: все изменения идут через одно соединение-
+    писатель под блокировкой, а чтения — через пул read-only соединений,
+    поэтому статистика, календарь и поиск из разных потоков не ждут
+    друг друга и записи. Каждый вызов получает собственный курсор.
+
+    Режимы надёжности (durability):
+        'full'    — commit после каждой операции, synchronous=FULL
+        'normal'  — commit после каждой операции, synchronous=NORMAL
+                    (в WAL fsync только при checkpoint)
+        'batched' — групповой commit: операции копятся в одной
+                    транзакции и фиксируются фоновым потоком раз в
+                    commit_interval секунд, при max_pending операциях,
+                    при flush() и при close(); пока commit не выполнен,
+                    чтения идут через соединение-писатель и видят
+                    отложенные изменения
+
+    Режим меняется на лету через set_durability(); приложение хранит
+    его в настройке 'durability'.
+    """
+
+    DURABILITY_MODES = ("full", "normal", "batched")
+
+    # Миграции схемы: (версия, описание, SQL-команды).
+    # Текущая версия БД хранится в PRAGMA user_version; новые миграции
+    # добавляются только в конец списка со следующим номером.
+    MIGRATIONS = [
+        (1, "Индекс (date, time) для выборок по дню с сортировкой по времени", [
+            "CREATE INDEX IF NOT EXISTS idx_entries_date_time ON entries(date, time)",
+            # Префикс нового индекса, больше не нужен
+            "DROP INDEX IF EXISTS idx_entries_date",
+        ]),
+        (2, "Индекс (emotion, date) для фильтра по эмоции за период", [
+            "CREATE INDEX IF NOT EXISTS idx_entries_emotion_date ON entries(emotion, date)",
+        ]),
+        (3, "Индекс (date, emotion_score) для среднего настроения по дням", [
+            "CREATE INDEX IF NOT EXISTS idx_entries_date_score ON entries(date, emotion_score)",
+        ]),
+        (4, "Хеш текста и версия анализатора, которой посчитана эмоция", [
+            "ALTER TABLE entries ADD COLUMN content_hash TEXT",
+            "ALTER TABLE entries ADD COLUMN analyzer_version TEXT",
+            "UPDATE entries SET content_hash = content_hash(content)",
+        ]),
+    ]
+
+    def __init__(self, db_path: str = "data/journal.db", readers: int = 4,
+                 durability: str = "full", commit_interval: float = 1.0,
+                 max_pending: int = 200):
+        """
+        Инициализация подключения к БД
+
+        Args:
+            db_path: путь к файлу БД
+            readers: максимальное число одновременных читающих соединений
+            durability: режим надёжности, см. DURABILITY_MODES
+            commit_interval: период группового commit в режиме 'batched'
+            max_pending: число операций, после которого commit в режиме
+                'batched' выполняется сразу
+        """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Неизвестный режим надёжности: {durability}")
 
-    def __init__(self, db_path: str = "data/journal.db"):
-        """Инициализация подключения к БД"""
         # Создаём папку data если её нет
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
 
         self.db_path = db_path
-        self.connection = sqlite3.connect(db_path, check_same_thread=False)
-        self.connection.row_factory = sqlite3.Row
-        self.cursor = self.connection.cursor()
+        self.durability = durability
+        self.commit_interval = commit_interval
+        self.max_pending = max_pending
+
+        self.connection = self._connect()
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self._set_synchronous()
+        self._write_lock = threading.RLock()
+        self._pending = 0
+
+        # Пул читателей: соединения создаются по мере необходимости
+        self._reader_pool = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(readers)
+        self._readers = []
+        self._readers_lock = threading.Lock()
 
         self._create_tables()
+        self._migrate()
+
+        # Кэш настроек: читается один раз, дальше write-through
+        self._setting_listeners = []
+        with self._read() as cursor:
+            cursor.execute("SELECT key, value FROM settings")
+            self._settings = {row['key']: row['value'] for row in cursor.fetchall()}
+
+        # Кэш серий дней, см. get_streaks()
+        self._streak_cache = None
+        self._streak_generation = 0
+
+        # Фоновый групповой commit
+        self._closing = threading.Event()
+        self._flusher = None
+        if durability == "batched":
+            self._start_flusher()
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Открытие соединения с БД"""
+        if read_only:
+            # Путь экранируется: '#', '?' и '%' в нём иначе читаются как часть URI
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA busy_timeout = 5000")
+        connection.create_function("content_hash", 1, content_hash, deterministic=True)
+        return connection
+
+    @contextmanager
+    def _write(self, immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+        """
+        Курсор соединения-писателя
+
+        Обычно транзакция фиксируется при выходе из блока и
+        откатывается при исключении. В режиме 'batched' блок
+        выполняется в SAVEPOINT внутри общей транзакции: ошибка
+        откатывает только эту операцию, а commit откладывается
+        до группового.
+
+        Args:
+            immediate: отдельная транзакция BEGIN IMMEDIATE с commit
+                на выходе — для массовых операций; отложенные
+                изменения перед ней фиксируются
+        """
+        with self._write_lock:
+            cursor = self.connection.cursor()
+            grouped = self.durability == "batched" and not immediate
+            try:
+                if grouped:
+                    # Внешняя транзакция нужна, иначе RELEASE сработает как COMMIT
+                    if not self.connection.in_transaction:
+                        cursor.execute("BEGIN")
+                    cursor.execute("SAVEPOINT write_op")
+                elif immediate:
+                    self._commit_pending()
+                    cursor.execute("BEGIN IMMEDIATE")
+
+                yield cursor
+
+                if grouped:
+                    cursor.execute("RELEASE write_op")
+                    self._pending += 1
+                    if self._pending >= self.max_pending:
+                        self._commit_pending()
+                else:
+                    self.connection.commit()
+            except BaseException:
+                if grouped:
+                    cursor.execute("ROLLBACK TO write_op")
+                    cursor.execute("RELEASE write_op")
+                else:
+                    self.connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def _set_synchronous(self):
+        """PRAGMA synchronous соединения-писателя по режиму надёжности"""
+        self.connection.execute(
+            f"PRAGMA synchronous = {'FULL' if self.durability == 'full' else 'NORMAL'}"
+        )
+
+    def _start_flusher(self):
+        """Запуск фонового потока группового commit"""
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="journal-db-flush", daemon=True
+        )
+        self._flusher.start()
+
+    def set_durability(self, durability: str):
+        """
+        Смена режима надёжности (см. DURABILITY_MODES)
+
+        Отложенные изменения фиксируются до смены режима.
+        """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Неизвестный режим надёжности: {durability}")
+
+        with self._write_lock:
+            self._commit_pending()
+            self.durability = durability
+            self._set_synchronous()
+            if durability == "batched" and self._flusher is None:
+                self._start_flusher()
+
+    def _commit_pending(self):
+        """Фиксация отложенных изменений (под блокировкой записи)"""
+        if self.connection.in_transaction:
+            self.connection.commit()
+        self._pending = 0
+
+    def flush(self):
+        """
+        Барьер записи: фиксирует все отложенные изменения
+
+        После возврата всё, что было записано до вызова, сохранено
+        на диске с выбранным уровнем synchronous и видно читателям.
+        """
+        with self._write_lock:
+            self._commit_pending()
+
+    def _flush_loop(self):
+        """Фоновый поток группового commit"""
+        while not self._closing.wait(self.commit_interval):
+            if self._pending:
+                self.flush()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Курсор читающего соединения из пула
+
+        Пока в режиме 'batched' есть отложенные изменения, читатели их
+        не видят, поэтому чтение идёт через соединение-писатель внутри
+        общей транзакции — без commit и без ожидания группового.
+        """
+        if self._pending:
+            with self._write_lock:
+                if self._pending:
+                    cursor = self.connection.cursor()
+                    try:
+                        yield cursor
+                    finally:
+                        cursor.close()
+                    return
+
+        self._reader_slots.acquire()
+        try:
+            try:
+                connection = self._reader_pool.get_nowait()
+            except queue.Empty:
+                connection = self._connect(read_only=True)
+                with self._readers_lock:
+                    self._readers.append(connection)
+
+            cursor = connection.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+                self._reader_pool.put(connection)
+        finally:
+            self._reader_slots.release()
 
     def _create_tables(self):
         """Создание таблиц в БД"""
-        # Таблица записей дневника
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS entries (
+        with self._write(immediate=True) as cursor:
+            # Таблица записей дневника
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    date DATE NOT NULL,
+                    time TIME NOT NULL,
+                    content TEXT NOT NULL,
+                    emotion TEXT DEFAULT 'neutral',
+                    emotion_score REAL DEFAULT 0.5,
+                    tags TEXT DEFAULT '',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Таблица настроек
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+            # Нормализованные теги
+            self._create_tag_tables(cursor)
+
+            # Дневные агрегаты для статистики
+            self._create_rollup_table(cursor)
+
+            # Полнотекстовый индекс
+            self.fts_enabled = self._create_fts(cursor)
+
+    def _migrate(self):
+        """
+        Применение недостающих миграций схемы
+
+        Каждая миграция выполняется в своей транзакции вместе с
+        обновлением user_version, поэтому сбой посередине не оставляет
+        схему в промежуточном состоянии. После применения обновляется
+        статистика планировщика (ANALYZE).
+        """
+        with self._read() as cursor:
+            cursor.execute("PRAGMA user_version")
+            current = cursor.fetchone()[0]
+
+        applied = False
+        for version, _description, statements in self.MIGRATIONS:
+            if version <= current:
+                continue
+
+            with self._write(immediate=True) as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+            applied = True
+
+        if applied:
+            with self._write(immediate=True) as cursor:
+                cursor.execute("ANALYZE")
+
+    @property
+    def schema_version(self) -> int:
+        """Текущая версия схемы БД"""
+        with self._read() as cursor:
+            cursor.execute("PRAGMA user_version")
+            return cursor.fetchone()[0]
+
+    def _table_exists(self, cursor: sqlite3.Cursor, name: str) -> bool:
+        """Проверка существования таблицы"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        )
+        return cursor.fetchone() is not None
+
+    def _create_tag_tables(self, cursor: sqlite3.Cursor):
+        """Создание таблиц тегов и связей запись-тег"""
+        is_new = not self._table_exists(cursor, "entry_tags")
+
+        # По одной команде, в транзакции _create_tables (см. _create_rollup_table)
+        statements = ["""
+            CREATE TABLE IF NOT EXISTS tags (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date DATE NOT NULL,
-                time TIME NOT NULL,
-                content TEXT NOT NULL,
-                emotion TEXT DEFAULT 'neutral',
-                emotion_score REAL DEFAULT 0.5,
-                tags TEXT DEFAULT '',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                name TEXT NOT NULL UNIQUE
             )
-        """)
+        """, """
+            CREATE TABLE IF NOT EXISTS entry_tags (
+                entry_id INTEGER NOT NULL REFERENCES entries(id),
+                tag_id INTEGER NOT NULL REFERENCES tags(id),
+                PRIMARY KEY (entry_id, tag_id)
+            ) WITHOUT ROWID
+        """, """
+            CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags(tag_id, entry_id)
+        """, """
+            CREATE TRIGGER IF NOT EXISTS entry_tags_ad AFTER DELETE ON entries BEGIN
+                DELETE FROM entry_tags WHERE entry_id = old.id;
+            END
+        """]
+        for statement in statements:
+            cursor.execute(statement)
 
-        # Таблица настроек
-        self.cursor.execute("""
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-        """)
+        # Однократный перенос тегов из строк entries.tags
+        if is_new:
+            cursor.execute("SELECT id, tags FROM entries WHERE tags != ''")
+            for row in cursor.fetchall():
+                self._set_entry_tags(cursor, row['id'], parse_tags(row['tags']))
+
+    @staticmethod
+    def _normalize_tag(tag: str) -> str:
+        """Нормализация имени тега"""
+        return tag.strip().lower()
 
-        # Индексы для быстрого поиска
-        self.cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date)
-        """)
+    def _set_entry_tags(self, cursor: sqlite3.Cursor, entry_id: int, tags: List[str]):
+        """Замена тегов записи (без commit)"""
+        cursor.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id,))
 
-        self.connection.commit()
+        names = {self._normalize_tag(t) for t in tags or []}
+        names.discard("")
+        if not names:
+            return
+
+        cursor.executemany(
+            "INSERT OR IGNORE INTO tags (name) VALUES (?)",
+            [(name,) for name in names]
+        )
+        cursor.executemany("""
+            INSERT OR IGNORE INTO entry_tags (entry_id, tag_id)
+            SELECT ?, id FROM tags WHERE name = ?
+        """, [(entry_id, name) for name in names])
+
+    def _create_rollup_table(self, cursor: sqlite3.Cursor):
+        """
+        Создание таблицы дневных агрегатов daily_rollup
+
+        На каждую пару (дата, эмоция) хранится число записей и сумма
+        emotion_score. Триггеры обновляют её в той же транзакции, что
+        и изменение entries, поэтому статистика не пересчитывается
+        по всем записям.
+        """
+        is_new = not self._table_exists(cursor, "daily_rollup")
+
+        # По одной команде: executescript зафиксировал бы транзакцию
+        # _create_tables, и прерванный первый запуск оставил бы таблицу
+        # без заполнения
+        statements = ["""
+            CREATE TABLE IF NOT EXISTS daily_rollup (
+                date DATE NOT NULL,
+                emotion TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                score_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (date, emotion)
+            ) WITHOUT ROWID
+        """, """
+            CREATE TRIGGER IF NOT EXISTS daily_rollup_ai AFTER INSERT ON entries BEGIN
+                INSERT INTO daily_rollup (date, emotion, count, score_sum)
+                VALUES (new.date, new.emotion, 1, new.emotion_score)
+                ON CONFLICT (date, emotion) DO UPDATE SET
+                    count = count + 1,
+                    score_sum = score_sum + excluded.score_sum;
+            END
+        """, """
+            CREATE TRIGGER IF NOT EXISTS daily_rollup_ad AFTER DELETE ON entries BEGIN
+                UPDATE daily_rollup
+                SET count = count - 1, score_sum = score_sum - old.emotion_score
+                WHERE date = old.date AND emotion = old.emotion;
+                DELETE FROM daily_rollup
+                WHERE date = old.date AND emotion = old.emotion AND count <= 0;
+            END
+        """, """
+            CREATE TRIGGER IF NOT EXISTS daily_rollup_au
+            AFTER UPDATE OF date, emotion, emotion_score ON entries BEGIN
+                UPDATE daily_rollup
+                SET count = count - 1, score_sum = score_sum - old.emotion_score
+                WHERE date = old.date AND emotion = old.emotion;
+                DELETE FROM daily_rollup
+                WHERE date = old.date AND emotion = old.emotion AND count <= 0;
+                INSERT INTO daily_rollup (date, emotion, count, score_sum)
+                VALUES (new.date, new.emotion, 1, new.emotion_score)
+                ON CONFLICT (date, emotion) DO UPDATE SET
+                    count = count + 1,
+                    score_sum = score_sum + excluded.score_sum;
+            END
+        """]
+        for statement in statements:
+            cursor.execute(statement)
+
+        # Однократное заполнение для существующей БД
+        if is_new:
+            cursor.execute("""
+                INSERT INTO daily_rollup (date, emotion, count, score_sum)
+                SELECT date, emotion, COUNT(*), SUM(emotion_score)
+                FROM entries
+                GROUP BY date, emotion
+            """)
+
+    def _create_fts(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Создание FTS5-индекса по тексту и тегам записей
+
+        Индекс хранит только токены (external content), а синхронизация
+        с таблицей entries выполняется триггерами.
+
+        Returns:
+            True, если FTS5 доступен в текущей сборке SQLite
+        """
+        is_new = not self._table_exists(cursor, "entries_fts")
+
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                    content, tags,
+                    content='entries', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError:
+            # SQLite собран без FTS5 — остаёмся на LIKE
+            return False
+
+        # По одной команде, в транзакции _create_tables: иначе прерванный
+        # первый запуск оставит индекс без заполнения
+        statements = ["""
+            CREATE TRIGGER IF NOT EXISTS entries_fts_ai AFTER INSERT ON entries BEGIN
+                INSERT INTO entries_fts(rowid, content, tags)
+                VALUES (new.id, new.content, new.tags);
+            END
+        """, """
+            CREATE TRIGGER IF NOT EXISTS entries_fts_ad AFTER DELETE ON entries BEGIN
+                INSERT INTO entries_fts(entries_fts, rowid, content, tags)
+                VALUES ('delete', old.id, old.content, old.tags);
+            END
+        """, """
+            CREATE TRIGGER IF NOT EXISTS entries_fts_au AFTER UPDATE OF content, tags ON entries BEGIN
+                INSERT INTO entries_fts(entries_fts, rowid, content, tags)
+                VALUES ('delete', old.id, old.content, old.tags);
+                INSERT INTO entries_fts(rowid, content, tags)
+                VALUES (new.id, new.content, new.tags);
+            END
+        """]
+        for statement in statements:
+            cursor.execute(statement)
+
+        # Однократное заполнение индекса для существующей БД
+        if is_new:
+            cursor.execute("INSERT INTO entries_fts(entries_fts) VALUES ('rebuild')")
+
+        return True
 
     # ===== CRUD операции для записей =====
 
     def add_entry(self, content: str, emotion: str, emotion_score: float,
-                  tags: List[str] = None, entry_date: date = None) -> int:
-        """Добавление новой записи"""
+                  tags: List[str] = None, entry_date: date = None,
+                  analyzer_version: str = None) -> int:
+        """
+        Добавление новой записи
+
+        analyzer_version — версия анализатора, которой посчитана эмоция
+        (EmotionAnalyzer.version); пересчёт пропускает такие записи.
+        """
         if entry_date is None:
             entry_date = date.today()
 
         current_time = datetime.now().strftime("%H:%M:%S")
         tags_str = ",".join(tags) if tags else ""
 
-        self.cursor.execute("""
-            INSERT INTO entries (date, time, content, emotion, emotion_score, tags)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (entry_date, current_time, content, emotion, emotion_score, tags_str))
+        with self._write() as cursor:
+            cursor.execute("""
+                INSERT INTO entries (date, time, content, emotion, emotion_score, tags,
+                                     content_hash, analyzer_version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (entry_date, current_time, content, emotion, emotion_score, tags_str,
+                  content_hash(content), analyzer_version))
+            entry_id = cursor.lastrowid
+
+            self._set_entry_tags(cursor, entry_id, tags)
 
-        self.connection.commit()
-        return self.cursor.lastrowid
+        if not self._streak_has_date(str(entry_date)):
+            self._invalidate_streaks()
+
+        return entry_id
 
     def update_entry(self, entry_id: int, content: str = None,
                      emotion: str = None, emotion_score: float = None,
-                     tags: List[str] = None) -> bool:
-        """Обновление записи"""
+                     tags: List[str] = None, analyzer_version: str = None) -> bool:
+        """
+        Обновление записи
+
+        Если меняется текст без новой оценки, версия анализатора
+        сбрасывается — запись попадёт в следующий пересчёт.
+        """
         updates = []
         values = []
 
         if content is not None:
             updates.append("content = ?")
             values.append(content)
+            updates.append("content_hash = ?")
+            values.append(content_hash(content))
         if emotion is not None:
             updates.append("emotion = ?")
             values.append(emotion)
         if emotion_score is not None:
             updates.append("emotion_score = ?")
             values.append(emotion_score)
+        if emotion is not None or emotion_score is not None or content is not None:
+            updates.append("analyzer_version = ?")
+            values.append(analyzer_version)
         if tags is not None:
             updates.append("tags = ?")
             values.append(",".join(tags))
@@ -102,150 +628,804 @@ class Database:
         values.append(entry_id)
 
         query = f"UPDATE entries SET {', '.join(updates)} WHERE id = ?"
-        self.cursor.execute(query, values)
-        self.connection.commit()
+        with self._write() as cursor:
+            cursor.execute(query, values)
+            updated = cursor.rowcount > 0
+
+            if updated and tags is not None:
+                self._set_entry_tags(cursor, entry_id, tags)
+
+            return updated
+
+    def add_entries_bulk(self, entries: Iterable[Dict[str, Any]], batch_size: int = 1000,
+                         on_progress: Callable[[int, float], None] = None) -> List[int]:
+        """
+        Массовое добавление записей в одной транзакции
+
+        Записи вставляются пачками через executemany, commit выполняется
+        один раз в конце; при ошибке транзакция откатывается целиком.
+        FTS-индекс и daily_rollup обновляются триггерами, теги — пачкой
+        после каждой вставки.
 
-        return self.cursor.rowcount > 0
+        Args:
+            entries: словари с ключами content, emotion, emotion_score и
+                необязательными tags (список или строка через запятую),
+                date, time, analyzer_version — формат совпадает с
+                экспортом в JSON
+            batch_size: размер пачки
+            on_progress: callback(добавлено, записей_в_секунду) после
+                каждой пачки
+
+        Returns:
+            ID добавленных записей в порядке входных данных
+        """
+        started = time.perf_counter()
+        now = datetime.now().strftime("%H:%M:%S")
+        new_ids = []
+
+        # Берём блокировку записи сразу, чтобы ID шли подряд
+        with self._write(immediate=True) as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM entries")
+            next_id = cursor.fetchone()[0] + 1
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'entries'")
+            row = cursor.fetchone()
+            if row and row['seq'] >= next_id:
+                next_id = row['seq'] + 1
+
+            iterator = iter(entries)
+            while True:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    break
+
+                rows = []
+                tag_links = []
+                for offset, entry in enumerate(batch):
+                    entry_id = next_id + offset
+                    tags = entry.get('tags') or []
+                    if isinstance(tags, str):
+                        tags = parse_tags(tags)
+
+                    rows.append((
+                        entry_id,
+                        entry.get('date') or date.today(),
+                        entry.get('time') or now,
+                        entry['content'],
+                        entry.get('emotion', 'neutral'),
+                        entry.get('emotion_score', 0.5),
+                        ",".join(tags),
+                        content_hash(entry['content']),
+                        entry.get('analyzer_version')
+                    ))
+                    names = {self._normalize_tag(t) for t in tags}
+                    names.discard("")
+                    tag_links.extend((entry_id, name) for name in names)
+
+                cursor.executemany("""
+                    INSERT INTO entries (id, date, time, content, emotion, emotion_score, tags,
+                                         content_hash, analyzer_version)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+
+                if tag_links:
+                    cursor.executemany(
+                        "INSERT OR IGNORE INTO tags (name) VALUES (?)",
+                        [(name,) for name in {name for _, name in tag_links}]
+                    )
+                    cursor.executemany("""
+                        INSERT OR IGNORE INTO entry_tags (entry_id, tag_id)
+                        SELECT ?, id FROM tags WHERE name = ?
+                    """, tag_links)
+
+                new_ids.extend(row[0] for row in rows)
+                next_id += len(rows)
+
+                if on_progress:
+                    elapsed = time.perf_counter() - started
+                    on_progress(len(new_ids), len(new_ids) / elapsed if elapsed > 0 else 0.0)
+
+        self._invalidate_streaks()
+        return new_ids
 
     def delete_entry(self, entry_id: int) -> bool:
         """Удаление записи"""
-        self.cursor.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
-        self.connection.commit()
-        return self.cursor.rowcount > 0
+        with self._write() as cursor:
+            # Последняя запись дня меняет набор дат — нужен пересчёт серий
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM entries d WHERE d.date = e.date) AS day_count
+                FROM entries e WHERE e.id = ?
+            """, (entry_id,))
+            row = cursor.fetchone()
+
+            cursor.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+            deleted = cursor.rowcount > 0
+
+        if row and row['day_count'] == 1:
+            self._invalidate_streaks()
+
+        return deleted
 
     def get_entry(self, entry_id: int) -> Optional[Dict[str, Any]]:
         """Получение записи по ID"""
-        self.cursor.execute("SELECT * FROM entries WHERE id = ?", (entry_id,))
-        row = self.cursor.fetchone()
-        return dict(row) if row else None
+        with self._read() as cursor:
+            cursor.execute("SELECT * FROM entries WHERE id = ?", (entry_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
 
     def get_entries_by_date(self, entry_date: date) -> List[Dict[str, Any]]:
         """Получение записей за определённую дату"""
-        self.cursor.execute(
-            "SELECT * FROM entries WHERE date = ? ORDER BY time DESC",
-            (entry_date,)
-        )
-        return [dict(row) for row in self.cursor.fetchall()]
+        with self._read() as cursor:
+            cursor.execute(
+                "SELECT * FROM entries WHERE date = ? ORDER BY time DESC",
+                (entry_date,)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _preview_columns(preview_length: int) -> str:
+        """
+        Колонки для EntryPreview
+
+        Берём на символ больше, чтобы truncate_text() знал, что текст
+        длиннее и нужно многоточие.
+        """
+        return (f"e.id, e.date, e.time, e.emotion, e.emotion_score, e.tags, "
+                f"substr(e.content, 1, {int(preview_length) + 1}) AS preview")
+
+    def get_previews_by_date(self, entry_date: date,
+                             preview_length: int = 80) -> List[EntryPreview]:
+        """Записи за дату для списка — без полного текста"""
+        with self._read() as cursor:
+            cursor.execute(f"""
+                SELECT {self._preview_columns(preview_length)} FROM entries e
+                WHERE e.date = ? ORDER BY e.time DESC
+            """, (entry_date,))
+            return [EntryPreview.from_row(row) for row in cursor.fetchall()]
+
+    def get_recent_previews(self, limit: int = 20,
+                            preview_length: int = 150) -> List[EntryPreview]:
+        """Последние записи для списка — без полного текста"""
+        with self._read() as cursor:
+            cursor.execute(f"""
+                SELECT {self._preview_columns(preview_length)} FROM entries e
+                ORDER BY e.date DESC, e.time DESC, e.id DESC
+                LIMIT ?
+            """, (limit,))
+            return [EntryPreview.from_row(row) for row in cursor.fetchall()]
 
     def get_entries_range(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
         """Получение записей за период"""
-        self.cursor.execute("""
-            SELECT * FROM entries 
-            WHERE date BETWEEN ? AND ? 
-            ORDER BY date DESC, time DESC
-        """, (start_date, end_date))
-        return [dict(row) for row in self.cursor.fetchall()]
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT * FROM entries 
+                WHERE date BETWEEN ? AND ? 
+                ORDER BY date DESC, time DESC
+            """, (start_date, end_date))
+            return [dict(row) for row in cursor.fetchall()]
 
     def get_all_entries(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """Получение всех записей с пагинацией"""
-        self.cursor.execute("""
-            SELECT * FROM entries 
-            ORDER BY date DESC, time DESC 
-            LIMIT ? OFFSET ?
-        """, (limit, offset))
-        return [dict(row) for row in self.cursor.fetchall()]
-
-    def search_entries(self, query: str) -> List[Dict[str, Any]]:
-        """Поиск по записям"""
-        search_pattern = f"%{query}%"
-        self.cursor.execute("""
-            SELECT * FROM entries 
-            WHERE content LIKE ? OR tags LIKE ?
-            ORDER BY date DESC, time DESC
-        """, (search_pattern, search_pattern))
-        return [dict(row) for row in self.cursor.fetchall()]
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT * FROM entries 
+                ORDER BY date DESC, time DESC, id DESC 
+                LIMIT ? OFFSET ?
+            """, (limit, offset))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_entries_after(self, after: Tuple[str, str, int] = None,
+                          limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Постраничное получение записей по ключу (keyset pagination)
+
+        Args:
+            after: курсор (date, time, id) последней записи предыдущей
+                страницы, см. entry_cursor(); None — первая страница
+            limit: размер страницы
+
+        Returns:
+            Записи от новых к старым, идущие строго после курсора
+        """
+        with self._read() as cursor:
+            return self._fetch_page(cursor, after, limit)
+
+    @staticmethod
+    def _fetch_page(cursor: sqlite3.Cursor, after: Optional[Tuple[str, str, int]],
+                    limit: int) -> List[Dict[str, Any]]:
+        """Выборка страницы записей через переданный курсор"""
+        if after is None:
+            cursor.execute("""
+                SELECT * FROM entries 
+                ORDER BY date DESC, time DESC, id DESC 
+                LIMIT ?
+            """, (limit,))
+        else:
+            cursor.execute("""
+                SELECT * FROM entries 
+                WHERE (date, time, id) < (?, ?, ?)
+                ORDER BY date DESC, time DESC, id DESC 
+                LIMIT ?
+            """, (*after, limit))
+        return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def entry_cursor(entry: Dict[str, Any]) -> Tuple[str, str, int]:
+        """Курсор пагинации для записи"""
+        return entry['date'], entry['time'], entry['id']
+
+    def iter_entries(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Обход всех записей пачками ограниченного размера"""
+        after = None
+        while True:
+            batch = self.get_entries_after(after, batch_size)
+            yield from batch
+
+            if len(batch) < batch_size:
+                break
+            after = self.entry_cursor(batch[-1])
+
+    def search_entries(self, query: str, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Поиск по записям
+
+        При доступном FTS5 каждое слово запроса ищется как префикс,
+        результаты ранжируются по bm25, а в поле 'snippet' попадает
+        фрагмент текста с подсвеченными совпадениями. Без FTS5 —
+        поиск подстроки через LIKE. Запрос вида '#тег' ищет точное
+        совпадение тега.
+        """
+        rows = self._search_rows(query, "e.*", limit, with_snippet=True)
+        return [dict(row) for row in rows]
+
+    def search_previews(self, query: str, emotion: str = None, limit: int = None,
+                        preview_length: int = 150) -> List[EntryPreview]:
+        """Поиск как в search_entries, но без полного текста записей"""
+        rows = self._search_rows(query, self._preview_columns(preview_length),
+                                 limit, emotion=emotion)
+        return [EntryPreview.from_row(row) for row in rows]
+
+    def _search_rows(self, query: str, columns: str, limit: int = None,
+                     emotion: str = None, with_snippet: bool = False) -> List[sqlite3.Row]:
+        """Общая часть поиска: выбирает указанные колонки записей 'e'"""
+        limit = limit if limit is not None else -1
+        emotion_filter = "AND e.emotion = ?" if emotion else ""
+        emotion_args = (emotion,) if emotion else ()
+        no_snippet = ", NULL AS snippet" if with_snippet else ""
+
+        with self._read() as cursor:
+            if query.startswith("#"):
+                cursor.execute(f"""
+                    SELECT {columns}{no_snippet} FROM tags t
+                    JOIN entry_tags et ON et.tag_id = t.id
+                    JOIN entries e ON e.id = et.entry_id
+                    WHERE t.name = ? {emotion_filter}
+                    ORDER BY e.date DESC, e.time DESC
+                    LIMIT ?
+                """, (self._normalize_tag(query[1:]), *emotion_args, limit))
+                return cursor.fetchall()
+
+            fts_query = self._build_fts_query(query)
+            if self.fts_enabled and fts_query:
+                snippet = (", snippet(entries_fts, -1, '[', ']', '...', 12) AS snippet"
+                           if with_snippet else "")
+                cursor.execute(f"""
+                    SELECT {columns}{snippet},
+                           bm25(entries_fts) AS rank
+                    FROM entries_fts
+                    JOIN entries e ON e.id = entries_fts.rowid
+                    WHERE entries_fts MATCH ? {emotion_filter}
+                    ORDER BY rank
+                    LIMIT ?
+                """, (fts_query, *emotion_args, limit))
+                return cursor.fetchall()
+
+            search_pattern = f"%{query}%"
+            cursor.execute(f"""
+                SELECT {columns}{no_snippet} FROM entries e
+                WHERE (e.content LIKE ? OR e.tags LIKE ?) {emotion_filter}
+                ORDER BY e.date DESC, e.time DESC
+                LIMIT ?
+            """, (search_pattern, search_pattern, *emotion_args, limit))
+            return cursor.fetchall()
+
+    @staticmethod
+    def _build_fts_query(query: str) -> str:
+        """Преобразование пользовательского запроса в префиксный запрос FTS5"""
+        words = re.findall(r'\w+', query.lower())
+        return " ".join(f'"{word}"*' for word in words)
+
+    # ===== Теги =====
+
+    def get_entries_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Получение записей с указанным тегом"""
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT e.* FROM tags t
+                JOIN entry_tags et ON et.tag_id = t.id
+                JOIN entries e ON e.id = et.entry_id
+                WHERE t.name = ?
+                ORDER BY e.date DESC, e.time DESC
+            """, (self._normalize_tag(tag),))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_tag_counts(self, start_date: date = None, end_date: date = None) -> Dict[str, int]:
+        """Количество записей по каждому тегу за период"""
+        with self._read() as cursor:
+            if start_date and end_date:
+                cursor.execute("""
+                    SELECT t.name, COUNT(*) as count
+                    FROM entries e
+                    JOIN entry_tags et ON et.entry_id = e.id
+                    JOIN tags t ON t.id = et.tag_id
+                    WHERE e.date BETWEEN ? AND ?
+                    GROUP BY t.id
+                    ORDER BY count DESC, t.name
+                """, (start_date, end_date))
+            else:
+                cursor.execute("""
+                    SELECT t.name, COUNT(*) as count
+                    FROM entry_tags et
+                    JOIN tags t ON t.id = et.tag_id
+                    GROUP BY t.id
+                    ORDER BY count DESC, t.name
+                """)
+
+            return {row['name']: row['count'] for row in cursor.fetchall()}
+
+    def get_tag_cooccurrence(self, tag: str, limit: int = 20) -> Dict[str, int]:
+        """Теги, которые встречаются в одних записях с указанным тегом"""
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT t2.name, COUNT(*) as count
+                FROM tags t1
+                JOIN entry_tags a ON a.tag_id = t1.id
+                JOIN entry_tags b ON b.entry_id = a.entry_id AND b.tag_id != a.tag_id
+                JOIN tags t2 ON t2.id = b.tag_id
+                WHERE t1.name = ?
+                GROUP BY t2.id
+                ORDER BY count DESC, t2.name
+                LIMIT ?
+            """, (self._normalize_tag(tag), limit))
+
+            return {row['name']: row['count'] for row in cursor.fetchall()}
 
     # ===== Статистика =====
 
     def get_emotion_stats(self, start_date: date = None, end_date: date = None) -> Dict[str, int]:
         """Статистика по эмоциям за период"""
-        if start_date and end_date:
-            self.cursor.execute("""
-                SELECT emotion, COUNT(*) as count 
-                FROM entries 
-                WHERE date BETWEEN ? AND ?
-                GROUP BY emotion
-            """, (start_date, end_date))
-        else:
-            self.cursor.execute("""
-                SELECT emotion, COUNT(*) as count 
-                FROM entries 
-                GROUP BY emotion
-            """)
+        with self._read() as cursor:
+            if start_date and end_date:
+                cursor.execute("""
+                    SELECT emotion, SUM(count) as count 
+                    FROM daily_rollup 
+                    WHERE date BETWEEN ? AND ?
+                    GROUP BY emotion
+                """, (start_date, end_date))
+            else:
+                cursor.execute("""
+                    SELECT emotion, SUM(count) as count 
+                    FROM daily_rollup 
+                    GROUP BY emotion
+                """)
 
-        return {row['emotion']: row['count'] for row in self.cursor.fetchall()}
+            return {row['emotion']: row['count'] for row in cursor.fetchall()}
 
     def get_daily_mood(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
-        """Среднее настроение по дням"""
-        self.cursor.execute("""
-            SELECT date, AVG(emotion_score) as avg_score, 
-                   GROUP_CONCAT(emotion) as emotions
-            FROM entries 
-            WHERE date BETWEEN ? AND ?
-            GROUP BY date
-            ORDER BY date
-        """, (start_date, end_date))
-        return [dict(row) for row in self.cursor.fetchall()]
+        """
+        Среднее настроение по дням
+
+        Преобладающая эмоция дня (больше всего записей, при равенстве —
+        первая по алфавиту) выбирается оконной функцией и отдаётся в
+        поле 'emotion'. В поле 'emotions' эмоции дня перечислены через
+        запятую: первой идёт преобладающая, порядок остальных не задан.
+        """
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT date, SUM(score_sum) / SUM(count) as avg_score,
+                       MAX(CASE WHEN rank = 1 THEN emotion END) as emotion,
+                       MAX(CASE WHEN rank = 1 THEN emotion END)
+                           || COALESCE(',' || GROUP_CONCAT(CASE WHEN rank > 1 THEN emotion END), '')
+                           as emotions
+                FROM (
+                    SELECT date, emotion, count, score_sum,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY date ORDER BY count DESC, emotion
+                           ) as rank
+                    FROM daily_rollup
+                    WHERE date BETWEEN ? AND ?
+                )
+                GROUP BY date
+                ORDER BY date
+            """, (start_date, end_date))
+            return [dict(row) for row in cursor.fetchall()]
 
     def get_total_entries(self) -> int:
         """Общее количество записей"""
-        self.cursor.execute("SELECT COUNT(*) FROM entries")
-        return self.cursor.fetchone()[0]
+        with self._read() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM entries")
+            return cursor.fetchone()[0]
 
-    def get_streak(self) -> int:
-        """Текущая серия дней с записями"""
-        self.cursor.execute("""
-            SELECT DISTINCT date FROM entries ORDER BY date DESC
-        """)
-        dates = [row['date'] for row in self.cursor.fetchall()]
+    def get_streaks(self) -> Dict[str, Any]:
+        """
+        Серии дней с записями
 
-        if not dates:
-            return 0
+        Все серии считаются одним запросом по индексу дат (gaps and
+        islands: у дней одной серии разность даты и номера строки
+        совпадает). Результат кэшируется и сбрасывается только когда
+        меняется набор дат с записями — при первой записи нового дня
+        или удалении последней записи дня — и при смене дня.
 
-        streak = 0
+        Returns:
+            Dict с ключами:
+                - current: текущая серия (заканчивается сегодня или вчера)
+                - longest: самая длинная серия
+                - history: список серий {'start', 'end', 'length'} по
+                  возрастанию дат
+        """
         today = date.today()
+        cache = self._streak_cache
+        if cache and cache['today'] == today:
+            return cache['result']
+
+        generation = self._streak_generation
+        with self._read() as cursor:
+            cursor.execute("""
+                WITH days AS (
+                    SELECT DISTINCT date FROM entries
+                ),
+                islands AS (
+                    SELECT date, julianday(date) - ROW_NUMBER() OVER (ORDER BY date) AS grp
+                    FROM days
+                )
+                SELECT MIN(date) AS start, MAX(date) AS end, COUNT(*) AS length
+                FROM islands
+                GROUP BY grp
+                ORDER BY start
+            """)
+            history = [dict(row) for row in cursor.fetchall()]
 
-        for i, d in enumerate(dates):
-            # Преобразуем строку в date если нужно
-            if isinstance(d, str):
-                d = datetime.strptime(d, "%Y-%m-%d").date()
+        current = 0
+        if history and history[-1]['end'] in (str(today), str(today - timedelta(days=1))):
+            current = history[-1]['length']
 
-            expected_date = today - timedelta(days=i)
-            if d == expected_date:
-                streak += 1
-            else:
-                break
+        result = {
+            'current': current,
+            'longest': max((s['length'] for s in history), default=0),
+            'history': history
+        }
 
-        return streak
+        # Не сохраняем результат, если пока считали, данные изменились
+        if generation == self._streak_generation:
+            self._streak_cache = {
+                'today': today,
+                'result': result,
+                'starts': [s['start'] for s in history]
+            }
+        return result
+
+    def get_streak(self) -> int:
+        """Текущая серия дней с записями"""
+        return self.get_streaks()['current']
+
+    def _streak_has_date(self, day: str) -> bool:
+        """
+        Есть ли в закэшированных сериях день day (без обращения к БД)
+
+        Без кэша — False: get_streaks() в другом потоке может как раз
+        считать серии, и сброс (новое поколение) не даст ему сохранить
+        устаревший результат.
+        """
+        cache = self._streak_cache
+        if not cache:
+            return False
+
+        i = bisect.bisect_right(cache['starts'], day) - 1
+        return i >= 0 and day <= cache['result']['history'][i]['end']
+
+    def _invalidate_streaks(self):
+        """Сброс кэша серий"""
+        self._streak_generation += 1
+        self._streak_cache = None
 
     # ===== Настройки =====
 
     def get_setting(self, key: str, default: str = None) -> Optional[str]:
-        """Получение настройки"""
-        self.cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        row = self.cursor.fetchone()
-        return row['value'] if row else default
+        """Получение настройки (из кэша в памяти)"""
+        return self._settings.get(key, default)
 
     def set_setting(self, key: str, value: str):
         """Сохранение настройки"""
-        self.cursor.execute("""
-            INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
-        """, (key, value))
-        self.connection.commit()
+        self.set_settings({key: value})
+
+    def set_settings(self, values: Dict[str, str]):
+        """
+        Сохранение нескольких настроек в одной транзакции
+
+        Кэш обновляется после успешной записи, затем слушатели
+        получают уведомления об изменившихся значениях.
+        """
+        with self._write_lock:
+            changed = {
+                key: value for key, value in values.items()
+                if self._settings.get(key) != value
+            }
+            if not changed:
+                return
+
+            with self._write() as cursor:
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)
+                """, list(changed.items()))
+            self._settings.update(changed)
+
+        for key, value in changed.items():
+            for listen_key, callback in list(self._setting_listeners):
+                if listen_key is None or listen_key == key:
+                    callback(key, value)
+
+    def add_setting_listener(self, callback: Callable[[str, str], None], key: str = None):
+        """
+        Подписка на изменение настроек
+
+        Args:
+            callback: функция callback(ключ, новое_значение); вызывается
+                в потоке, который сохранил настройку
+            key: ключ настройки; None — все настройки
+        """
+        self._setting_listeners.append((key, callback))
+
+    def remove_setting_listener(self, callback: Callable[[str, str], None]):
+        """Отписка от изменений настроек"""
+        self._setting_listeners = [
+            (key, cb) for key, cb in self._setting_listeners if cb != callback
+        ]
+
+    # ===== Пересчёт эмоций =====
+
+    # Меньше записей к пересчёту — без пула процессов: его запуск
+    # дольше, чем векторный подсчёт в текущем процессе
+    REANALYZE_POOL_MIN = 5000
+
+    def reanalyze_entries(self, analyzer, workers: int = None, batch_size: int = 500,
+                          on_progress: Callable[[int, int], None] = None,
+                          restart: bool = False) -> Dict[str, int]:
+        """
+        Пересчёт emotion/emotion_score записей
+
+        Пропускаются записи, уже оценённые текущей версией анализатора
+        (analyzer.version в колонке analyzer_version). Остальные
+        читаются по возрастанию ID пачками, анализируются параллельно
+        через analyzer.analyze_many (при одном процессе или меньше
+        REANALYZE_POOL_MIN записей — пачками в VectorScorer, без пула)
+        и записываются пачками, каждая в
+        своей транзакции вместе с версией, которой посчитан каждый
+        результат. Поэтому прерванный пересчёт
+        при следующем запуске продолжается с места остановки. Запись,
+        изменённая во время пересчёта, не перезаписывается устаревшей
+        оценкой.
+
+        Args:
+            analyzer: EmotionAnalyzer
+            workers: число процессов анализа (None — по числу ядер,
+                1 — в текущем процессе)
+            batch_size: записей в одной транзакции
+            on_progress: callback(обработано, всего) после каждой пачки
+            restart: пересчитать все записи, не глядя на версию
+
+        Returns:
+            {'processed': обработано за вызов, 'updated': изменилась оценка,
+             'total': всего записей}
+        """
+        skip_version = None if restart else analyzer.version
+
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT COUNT(*), COALESCE(SUM(analyzer_version = ?), 0) FROM entries
+            """, (analyzer.version,))
+            total, done = cursor.fetchone()
+        if restart:
+            done = 0
+
+        rows = deque()
+
+        def texts():
+            for row in self._iter_reanalysis_rows(skip_version, batch_size):
+                rows.append(row)
+                yield row['content']
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1 or total - done < self.REANALYZE_POOL_MIN:
+            results = self._vector_results(analyzer, texts(), batch_size)
+        else:
+            results = analyzer.analyze_many(texts(), workers=workers)
+
+        processed = updated = 0
+        batch = []
+        for result in results:
+            batch.append((rows.popleft(), result))
+            processed += 1
+
+            if len(batch) >= batch_size:
+                updated += self._save_reanalysis(batch)
+                batch = []
+                if on_progress:
+                    on_progress(done + processed, total)
+
+        if batch:
+            updated += self._save_reanalysis(batch)
+        if on_progress:
+            on_progress(done + processed, total)
+
+        return {'processed': processed, 'updated': updated, 'total': total}
+
+    @staticmethod
+    def _vector_results(analyzer, texts: Iterator[str], batch_size: int) -> Iterator[Dict[str, Any]]:
+        """Результаты анализа текстов пачками через VectorScorer"""
+        # NumPy нужен только пересчёту, а не слою хранения
+        from src.vector_scorer import VectorScorer
+        scorer = VectorScorer(analyzer)
+        while True:
+            batch = list(islice(texts, batch_size))
+            if not batch:
+                break
+            yield from scorer.analyze(batch)
+
+    def _iter_reanalysis_rows(self, skip_version: Optional[str],
+                              batch_size: int) -> Iterator[sqlite3.Row]:
+        """Записи по возрастанию ID; с версией skip_version пропускаются"""
+        skip = "" if skip_version is None else "AND analyzer_version IS NOT ?"
+        params = () if skip_version is None else (skip_version,)
+
+        after_id = 0
+        while True:
+            with self._read() as cursor:
+                cursor.execute(f"""
+                    SELECT id, content, content_hash, emotion, emotion_score FROM entries
+                    WHERE id > ? {skip}
+                    ORDER BY id LIMIT ?
+                """, (after_id, *params, batch_size))
+                batch = cursor.fetchall()
+
+            yield from batch
+            if len(batch) < batch_size:
+                break
+            after_id = batch[-1]['id']
+
+    def _save_reanalysis(self, batch: List[Tuple[sqlite3.Row, Dict[str, Any]]]) -> int:
+        """
+        Запись пачки пересчитанных оценок
+
+        Версия берётся из каждого результата, а не у анализатора:
+        словарь могли подменить, пока пачка считалась.
+
+        Записи с прежней оценкой только получают новую версию —
+        без изменения emotion, чтобы не трогать daily_rollup.
+        Условие по content_hash отсекает записи, изменённые после
+        чтения.
+
+        Returns:
+            Количество записей с изменившейся оценкой
+        """
+        changed = []
+        unchanged = []
+        for row, result in batch:
+            if (result['emotion'], result['score']) != (row['emotion'], row['emotion_score']):
+                changed.append((result['emotion'], result['score'], result['version'],
+                                row['id'], row['content_hash']))
+            else:
+                unchanged.append((result['version'], row['id'], row['content_hash']))
+
+        with self._write(immediate=True) as cursor:
+            updated = 0
+            if changed:
+                cursor.executemany("""
+                    UPDATE entries SET emotion = ?, emotion_score = ?, analyzer_version = ?
+                    WHERE id = ? AND content_hash IS ?
+                """, changed)
+                updated = cursor.rowcount
+            if unchanged:
+                cursor.executemany("""
+                    UPDATE entries SET analyzer_version = ?
+                    WHERE id = ? AND content_hash IS ?
+                """, unchanged)
+        return updated
 
     # ===== Экспорт/Импорт =====
 
+    EXPORT_FORMATS = ("json", "ndjson")
+
+    def export_entries(self, filepath: str, fmt: str = "json", compress: bool = None,
+                       on_progress: Callable[[int, int], None] = None,
+                       batch_size: int = 500) -> int:
+        """
+        Потоковый экспорт всех записей
+
+        Записи читаются пачками по ключу через пул читателей
+        и сразу пишутся в файл, поэтому память не зависит от размера
+        дневника, а метод можно вызывать из фонового потока. Файл
+        собирается во временном '<путь>.part' и подменяется только
+        после успешной записи.
+
+        Args:
+            filepath: путь к файлу
+            fmt: 'json' — массив как в export_to_json, 'ndjson' — по
+                объекту в строке
+            compress: сжимать gzip; None — по расширению '.gz'
+            on_progress: callback(записано, всего) после каждой пачки
+            batch_size: размер пачки чтения
+
+        Returns:
+            Количество экспортированных записей
+        """
+        if fmt not in self.EXPORT_FORMATS:
+            raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+        if compress is None:
+            compress = filepath.endswith(".gz")
+
+        tmp_path = filepath + ".part"
+        written = 0
+
+        try:
+            total = self.get_total_entries()
+
+            opener = gzip.open if compress else open
+            with opener(tmp_path, 'wt', encoding='utf-8') as f:
+                if fmt == "json":
+                    f.write("[")
+
+                after = None
+                while True:
+                    batch = self.get_entries_after(after, batch_size)
+                    for entry in batch:
+                        if fmt == "ndjson":
+                            f.write(json.dumps(entry, ensure_ascii=False, default=str))
+                            f.write("\n")
+                        else:
+                            # Тот же вид, что и у json.dump(список, indent=2)
+                            item = json.dumps(entry, ensure_ascii=False, indent=2, default=str)
+                            f.write(",\n  " if written else "\n  ")
+                            f.write(item.replace("\n", "\n  "))
+                        written += 1
+
+                    if on_progress:
+                        on_progress(written, total)
+                    if len(batch) < batch_size:
+                        break
+                    after = self.entry_cursor(batch[-1])
+
+                if fmt == "json":
+                    f.write("\n]" if written else "]")
+
+            os.replace(tmp_path, filepath)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return written
+
     def export_to_json(self, filepath: str):
         """Экспорт всех данных в JSON"""
-        entries = self.get_all_entries(limit=10000)
+        return self.export_entries(filepath, fmt="json")
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(entries, f, ensure_ascii=False, indent=2, default=str)
+    def clear_entries(self):
+        """Удаление всех записей"""
+        with self._write() as cursor:
+            cursor.execute("DELETE FROM entries")
+        self._invalidate_streaks()
 
     def close(self):
-        """Закрытие соединения с БД"""
-        self.connection.close()
+        """Закрытие соединений с БД (отложенные изменения сохраняются)"""
+        self._closing.set()
+        if self._flusher:
+            self._flusher.join()
+        self.flush()
 
+        with self._readers_lock:
+            for connection in self._readers:
+                connection.close()
+            self._readers.clear()
 
-# Импорт для streak
-from datetime import timedelta
\ No newline at end of file
+        with self._write_lock:
+            self.connection.close()
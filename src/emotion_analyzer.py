@@ -3,12 +3,32 @@
 Использует комбинацию правил и TextBlob для анализа
 """
 
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Iterable, Iterator, Optional
+from collections import OrderedDict
+from itertools import islice
+from types import MappingProxyType
+import hashlib
+import json
+import multiprocessing
+import os
 import re
+import threading
+
+from src.lexicon import CompiledLexicon, Lexicon
+from src.stem_lexicon import StemLexicon
+from src.utils import content_hash
 
 
 class EmotionAnalyzer:
-    """Анализатор эмоций на основе текста"""
+    """
+    Анализатор эмоций на основе текста
+
+    Один экземпляр можно использовать из нескольких потоков (в том
+    числе в сборках CPython без GIL). Всё, что нужно для анализа, лежит
+    в неизменяемом CompiledLexicon, который подменяется целиком; вызов
+    analyze() не меняет общего состояния, кроме кэша результатов под
+    блокировкой, и не трогает глобальных кэшей модулей.
+    """
 
     # Словари эмоциональных слов (русский + английский)
     EMOTION_WORDS = {
@@ -117,25 +137,200 @@ class EmotionAnalyzer:
         'not', 'no', 'never', "don't", "doesn't", "didn't", "won't"
     ]
 
-    def __init__(self):
-        """Инициализация анализатора"""
-        # Компилируем регулярки для быстрого поиска
-        self._compile_patterns()
+    # Версия алгоритма; вместе с хешем словаря образует self.version.
+    # Увеличивается при любом изменении правил подсчёта.
+    ENGINE_VERSION = 1
 
-    def _compile_patterns(self):
-        """Компиляция паттернов для поиска"""
-        self.emotion_patterns = {}
+    # Размер кэша результатов analyze()
+    MEMO_SIZE = 256
 
-        for emotion, data in self.EMOTION_WORDS.items():
-            # Создаём паттерн для поиска слов
-            words = data['words']
-            pattern = r'\b(' + '|'.join(re.escape(w) for w in words) + r')\b'
-            self.emotion_patterns[emotion] = re.compile(pattern, re.IGNORECASE)
+    # Окно после отрицания: \s* и \w* как в эталонном паттерне
+    # (benchmarks/differential.py)
+    WORD_RE = re.compile(r'\w+')
+    SPACE_RE = re.compile(r'\s*')
 
-    def analyze(self, text: str) -> Dict[str, any]:
+    def __init__(self, stemming: bool = False, lexicon_paths: List[str] = None,
+                 cache_dir: str = None):
+        """
+        Инициализация анализатора
+
+        Args:
+            stemming: распознавать словоформы русских слов словаря по
+                основам ('радостная', 'устали'), а не только
+                перечисленные формы
+            lexicon_paths: файлы словарей (Lexicon), дополняющие
+                встроенный, в порядке применения
+            cache_dir: каталог для скомпилированного словаря; если
+                словарь изменился, он пересобирается
+        """
+        self.stemming = stemming
+        self.lexicon_paths = list(lexicon_paths or [])
+        self.cache_dir = cache_dir
+        # Ошибка последней фоновой перезагрузки словаря
+        self.lexicon_error: Optional[Exception] = None
+
+        # Заготовка оценок: копируется в начале подсчёта
+        self._zero_scores = MappingProxyType(dict.fromkeys(self.EMOTION_WORDS, 0.0))
+
+        # Кэш результатов по хешу текста (LRU)
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+        # Всё состояние словаря — один объект, подменяемый целиком
+        self._lexicon = self._compile_lexicon(self.lexicon_paths)
+
+    @property
+    def version(self) -> str:
+        """Версия анализатора: оценки с другой версией считаются устаревшими"""
+        return self._lexicon.version
+
+    # ===== Словарь =====
+
+    def _builtin_lexicon(self) -> Lexicon:
+        """Встроенный словарь класса"""
+        return Lexicon(
+            {emotion: list(data['words']) for emotion, data in self.EMOTION_WORDS.items()},
+            dict(self.INTENSIFIERS),
+            list(self.NEGATIONS),
+        )
+
+    def _compile_lexicon(self, lexicon_paths: List[str]) -> CompiledLexicon:
+        """
+        Сборка словаря: встроенный + файлы
+
+        Скомпилированный словарь берётся из cache_dir, если он собран
+        из тех же файлов, иначе собирается и сохраняется туда.
+
+        Raises:
+            OSError, ValueError: файл словаря не читается или некорректен
+        """
+        cache_path = source_key = None
+        if self.cache_dir:
+            source_key = self._source_key(lexicon_paths)
+            cache_path = CompiledLexicon.cache_path(self.cache_dir, source_key)
+            compiled = CompiledLexicon.load(cache_path, source_key)
+            if compiled is not None:
+                return compiled
+
+        lexicon = self._builtin_lexicon()
+        for path in lexicon_paths:
+            lexicon = lexicon.merged(Lexicon.from_file(path))
+
+        unknown = set(lexicon.emotion_words) - set(self.EMOTION_WORDS)
+        if unknown:
+            raise ValueError(f"Неизвестные эмоции в словаре: {', '.join(sorted(unknown))}")
+
+        compiled = CompiledLexicon.compile(lexicon, self._lexicon_version(lexicon), self.stemming)
+        if cache_path:
+            try:
+                compiled.save(cache_path, source_key)
+            except (OSError, ValueError):
+                # Без кэша (нет доступа или словарь не помещается в формат
+                # файла) анализатор работает, просто собирает словарь сам
+                pass
+        return compiled
+
+    def _source_key(self, lexicon_paths: List[str]) -> str:
+        """
+        Ключ кэша скомпилированного словаря: хеш алгоритма, встроенного
+        словаря, настроек основ и содержимого файлов словарей
+        """
+        digest = hashlib.blake2b(digest_size=10)
+        builtin = json.dumps(
+            [self.ENGINE_VERSION, self.stemming, StemLexicon.MIN_STEM, StemLexicon.ENDINGS,
+             sorted(StemLexicon.UNINFLECTED), sorted(StemLexicon.EXCLUDED_FORMS),
+             self.EMOTION_WORDS, self.INTENSIFIERS, self.NEGATIONS],
+            ensure_ascii=False, sort_keys=True
+        )
+        digest.update(builtin.encode("utf-8"))
+        for path in lexicon_paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.hexdigest()
+
+    def _lexicon_version(self, lexicon: Lexicon) -> str:
+        """Версия анализатора для словаря: алгоритм + хеш слов (+ основы)"""
+        emotion_words = {
+            emotion: dict(data, words=lexicon.emotion_words.get(emotion, []))
+            for emotion, data in self.EMOTION_WORDS.items()
+        }
+        dump = json.dumps(
+            [emotion_words, lexicon.intensifiers, lexicon.negations],
+            ensure_ascii=False, sort_keys=True
+        )
+        version = f"{self.ENGINE_VERSION}.{hashlib.blake2b(dump.encode('utf-8'), digest_size=6).hexdigest()}"
+        if self.stemming:
+            rules = "\n".join(
+                sorted(set(StemLexicon.ENDINGS))
+                + ["-"] + sorted(StemLexicon.UNINFLECTED)
+                + ["-"] + sorted(StemLexicon.EXCLUDED_FORMS)
+            ).encode("utf-8")
+            version += f".s{StemLexicon.MIN_STEM}{hashlib.blake2b(rules, digest_size=3).hexdigest()}"
+        return version
+
+    def reload_lexicon(self, lexicon_paths: List[str] = None,
+                       background: bool = False) -> Optional[threading.Thread]:
+        """
+        Перезагрузка словаря с атомарной подменой
+
+        Новый словарь собирается (или загружается из cache_dir) рядом
+        с текущим; анализ продолжает работать со старым, пока новый не
+        готов. При ошибке остаётся старый словарь.
+
+        Args:
+            lexicon_paths: новые файлы словарей (None — прежние)
+            background: собирать в фоновом потоке
+
+        Returns:
+            Поток сборки при background=True, иначе None
+
+        Raises:
+            OSError, ValueError: при background=False, если файл словаря
+                некорректен (при фоновой сборке ошибка — в lexicon_error)
+        """
+        paths = list(self.lexicon_paths if lexicon_paths is None else lexicon_paths)
+
+        def build():
+            # Параллельные перезагрузки применяются по очереди
+            with self._reload_lock:
+                compiled = self._compile_lexicon(paths)
+                self._lexicon = compiled
+                self.lexicon_paths = paths
+                self.lexicon_error = None
+                with self._memo_lock:
+                    self._memo.clear()
+
+        if not background:
+            build()
+            return None
+
+        def build_in_background():
+            try:
+                build()
+            except (OSError, ValueError) as e:
+                self.lexicon_error = e
+
+        thread = threading.Thread(target=build_in_background, daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def _is_word_char(ch: str) -> bool:
+        """Символ слова в смысле \\w"""
+        return ch.isalnum() or ch == '_'
+
+    def analyze(self, text: str, spans: bool = False) -> Dict[str, any]:
         """
         Анализ текста на эмоции
 
+        Args:
+            text: текст
+            spans: добавить в результат позиции найденных слов
+                (считаются тем же проходом, что и оценки)
+
         Returns:
             Dict с ключами:
                 - emotion: главная эмоция
@@ -143,42 +338,241 @@ class EmotionAnalyzer:
                 - all_emotions: dict со всеми эмоциями и их скорами
                 - emoji: эмодзи эмоции
                 - color: цвет эмоции
+                - version: версия анализатора (self.version), которой
+                  посчитан результат: словарь может смениться сразу
+                  после вызова
+                - spans: при spans=True — список dict с ключами start,
+                  end (позиции в text.lower(), обычно совпадают с
+                  позициями в text), kind ('emotion',
+                  'intensifier', 'negation'), emotion (для 'emotion',
+                  иначе None) и negated (слово под отрицанием)
         """
+        # Словарь читается один раз: подмена посреди вызова не видна
+        lexicon = self._lexicon
         if not text or not text.strip():
-            return self._default_result()
+            result = self._default_result()
+            result['version'] = lexicon.version
+            if spans:
+                result['spans'] = []
+            return result
+
+        key = self._memo_key(text, lexicon)
+        if not spans:
+            with self._memo_lock:
+                cached = self._memo.get(key)
+                if cached is not None:
+                    self._memo.move_to_end(key)
+                    return self._copy_result(cached)
+
+        found = [] if spans else None
+        hits, first_pos, negated = self._scan(text.lower(), lexicon, found)
+        result = self._score(hits, first_pos, negated, lexicon)
+        # В кэш уходит копия, сам результат больше никому не виден
+        self._remember(key, result)
+        if spans:
+            result['spans'] = self._span_dicts(found, negated)
+        return result
+
+    @staticmethod
+    def _span_dicts(found: List[tuple], negated: set) -> List[Dict[str, any]]:
+        """Позиции из прохода _scan в виде результата analyze(spans=True)"""
+        return [
+            {
+                'start': start,
+                'end': end,
+                'kind': kind,
+                'emotion': emotion,
+                'negated': kind == 'emotion' and phrase in negated,
+            }
+            for start, end, kind, emotion, phrase in sorted(found, key=lambda span: span[:3])
+        ]
+
+    @staticmethod
+    def _memo_key(text: str, lexicon: CompiledLexicon) -> str:
+        """Ключ кэша analyze(): версия словаря и хеш текста"""
+        return f"{lexicon.version}:{content_hash(text)}"
 
-        text_lower = text.lower()
+    def _remember(self, key: str, result: Dict[str, any]):
+        """Сохранение результата в кэш analyze() по ключу _memo_key"""
+        with self._memo_lock:
+            self._memo[key] = self._copy_result(result)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.MEMO_SIZE:
+                self._memo.popitem(last=False)
 
-        # Подсчитываем очки для каждой эмоции
-        emotion_scores = {emotion: 0.0 for emotion in self.EMOTION_WORDS}
+    @staticmethod
+    def _copy_result(result: Dict[str, any]) -> Dict[str, any]:
+        """Копия результата: кэш не должен меняться снаружи"""
+        return dict(result, all_emotions=dict(result['all_emotions']))
 
-        # Ищем слова каждой эмоции
-        for emotion, pattern in self.emotion_patterns.items():
-            matches = pattern.findall(text_lower)
+    def _score(self, hits: Dict[str, List[str]], first_pos: Dict[str, int],
+               negated: set, lexicon: CompiledLexicon) -> Dict[str, any]:
+        """Итоговый результат по данным прохода _scan"""
+        # Множитель считается один раз на каждое найденное слово
+        factors = {}
+        for sequence in hits.values():
+            for phrase in sequence:
+                if phrase not in factors:
+                    factors[phrase] = self._phrase_factor(phrase, first_pos, negated,
+                                                          lexicon.intensifiers)
 
-            for match in matches:
-                score = 1.0
+        # Суммируем в порядке появления слов — как эталонный алгоритм
+        emotion_scores = self._zero_scores.copy()
+        for emotion, sequence in hits.items():
+            for phrase in sequence:
+                emotion_scores[emotion] += factors[phrase]
 
-                # Проверяем наличие интенсификаторов перед словом
-                for intensifier, multiplier in self.INTENSIFIERS.items():
-                    if intensifier in text_lower:
-                        # Проверяем близость к слову
-                        int_pos = text_lower.find(intensifier)
-                        word_pos = text_lower.find(match.lower())
-                        if 0 < word_pos - int_pos < 20:
-                            score *= multiplier
-                            break
+        result = self._build_result(emotion_scores)
+        result['version'] = lexicon.version
+        return result
 
-                # Проверяем отрицания
-                for negation in self.NEGATIONS:
-                    neg_pattern = rf'\b{negation}\s+\w*\s*{re.escape(match)}'
-                    if re.search(neg_pattern, text_lower):
-                        # Отрицание инвертирует эмоцию
-                        score *= -0.5
-                        break
+    def _scan(self, text_lower: str, lexicon: CompiledLexicon,
+              spans: Optional[List[tuple]] = None) -> Tuple[Dict[str, List[str]], Dict[str, int], set]:
+        """
+        Один проход автомата по тексту
 
-                emotion_scores[emotion] += score
+        Если передан список spans, в него добавляются позиции найденного:
+        (начало, конец, вид, эмоция или None, строка словаря).
 
+        Returns:
+            (эмоция → найденные слова по порядку,
+             строка словаря → позиция первого вхождения,
+             слова, попавшие под отрицание)
+        """
+        n = len(text_lower)
+        is_word = self._is_word_char
+        patterns = lexicon.matcher.patterns
+        roles = lexicon.roles
+
+        first_pos = {}
+        candidates = []
+        negated_at = set()
+        negated = set()
+
+        for end, pattern_id in lexicon.matcher.find_all(text_lower):
+            phrase = patterns[pattern_id]
+            start = end - len(phrase)
+            if phrase not in first_pos:
+                first_pos[phrase] = start
+
+            emotions, is_negation = roles[pattern_id]
+            bounded = start == 0 or not is_word(text_lower[start - 1])
+            whole = bounded and (end == n or not is_word(text_lower[end]))
+
+            if emotions:
+                if start in negated_at:
+                    negated.add(phrase)
+                if whole:
+                    for emotion, order in emotions:
+                        candidates.append((start, order, end, emotion, phrase))
+
+            if spans is not None and whole and phrase in lexicon.intensifiers:
+                spans.append((start, end, 'intensifier', None, phrase))
+
+            if is_negation and bounded and end < n and text_lower[end].isspace():
+                if spans is not None:
+                    spans.append((start, end, 'negation', None, phrase))
+                # Окно отрицания: следующее слово (\w*) и начало слова за ним (\s*)
+                window_start = self.SPACE_RE.match(text_lower, end).end()
+                word = self.WORD_RE.match(text_lower, window_start)
+                word_end = word.end() if word else window_start
+                negated_at.update(range(window_start, word_end))
+                negated_at.add(self.SPACE_RE.match(text_lower, word_end).end())
+
+        # Словоформы, которых нет в словаре, — по основам
+        if lexicon.stems is not None:
+            exact = lexicon.exact_words
+            lookup = lexicon.stems.lookup
+            for token_match in self.WORD_RE.finditer(text_lower):
+                token = token_match.group()
+                if token in exact:
+                    continue
+                emotions = lookup(token)
+                if not emotions:
+                    continue
+                start = token_match.start()
+                if token not in first_pos:
+                    first_pos[token] = start
+                if start in negated_at:
+                    negated.add(token)
+                for emotion, order in emotions:
+                    candidates.append((start, order, token_match.end(), emotion, token))
+
+        # Совпадения одной эмоции не перекрываются, а из совпадений
+        # с одного места побеждает первое в списке — как в findall
+        hits = {}
+        last_end = {}
+        for start, _order, end, emotion, phrase in sorted(candidates):
+            if start < last_end.get(emotion, 0):
+                continue
+            hits.setdefault(emotion, []).append(phrase)
+            last_end[emotion] = end
+            if spans is not None:
+                spans.append((start, end, 'emotion', emotion, phrase))
+
+        return hits, first_pos, negated
+
+    def _phrase_factor(self, phrase: str, first_pos: Dict[str, int], negated: set,
+                       intensifiers: Dict[str, float]) -> float:
+        """Вклад одного вхождения слова с учётом интенсификаторов и отрицаний"""
+        score = 1.0
+
+        # Интенсификатор перед первым вхождением слова
+        word_pos = first_pos[phrase]
+        for intensifier, multiplier in intensifiers.items():
+            int_pos = first_pos.get(intensifier, -1)
+            if int_pos >= 0 and 0 < word_pos - int_pos < 20:
+                score *= multiplier
+                break
+
+        if phrase in negated:
+            score *= -0.5
+
+        return score
+
+    def analyze_many(self, texts: Iterable[str], workers: Optional[int] = None,
+                     chunksize: int = 64) -> Iterator[Dict[str, any]]:
+        """
+        Анализ множества текстов в пуле процессов
+
+        Тексты читаются порциями, поэтому на входе может быть генератор
+        любой длины. Следующая порция считается, пока отдаются
+        результаты предыдущей; порядок результатов совпадает с входом.
+
+        Args:
+            texts: тексты для анализа
+            workers: число процессов (None — по числу ядер, 1 — без пула)
+            chunksize: текстов в одной задаче процесса
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        iterator = iter(texts)
+        window = max(1, workers * chunksize * 4)
+        batch = list(islice(iterator, window))
+
+        # Пул не окупается для одного процесса или пары задач
+        if workers <= 1 or len(batch) <= chunksize:
+            for text in batch:
+                yield self.analyze(text)
+            for text in iterator:
+                yield self.analyze(text)
+            return
+
+        # spawn, а не fork: процесс с Tk и фоновыми потоками нельзя
+        # безопасно копировать (захваченные блокировки, соединения SQLite)
+        context = multiprocessing.get_context("spawn")
+        initargs = (type(self), self.stemming, self.lexicon_paths, self.cache_dir)
+        with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            pending = pool.map_async(_analyze_in_worker, batch, chunksize)
+            while pending is not None:
+                batch = list(islice(iterator, window))
+                following = pool.map_async(_analyze_in_worker, batch, chunksize) if batch else None
+                yield from pending.get()
+                pending = following
+
+    def _build_result(self, emotion_scores: Dict[str, float]) -> Dict[str, any]:
+        """Нормализация скоров и выбор доминирующей эмоции"""
         # Нормализуем скоры
         total = sum(abs(s) for s in emotion_scores.values())
         if total > 0:
@@ -213,7 +607,7 @@ class EmotionAnalyzer:
         return {
             'emotion': 'calm',
             'score': 0.5,
-            'all_emotions': {e: 0.0 for e in self.EMOTION_WORDS},
+            'all_emotions': self._zero_scores.copy(),
             'emoji': self.EMOTION_WORDS['calm']['emoji'],
             'color': self.EMOTION_WORDS['calm']['color']
         }
@@ -242,4 +636,130 @@ class EmotionAnalyzer:
             'surprise': 'Удивление',
             'calm': 'Спокойствие'
         }
-        return translations.get(emotion, emotion)
\ No newline at end of file
+        return translations.get(emotion, emotion)
+
+
+class IncrementalAnalyzer:
+    """
+    Анализ текста редактора с кэшем по предложениям
+
+    Текст делится на предложения (граница — . ! ? … и пробелы после
+    них). Для каждого предложения кэшируется результат прохода
+    автомата, при очередном вызове заново сканируются только новые
+    или изменённые предложения, остальные берутся из кэша и
+    сводятся. Ни слова словаря, ни окна отрицаний не пересекают
+    границу предложения, поэтому итог совпадает с analyze() для
+    всего текста.
+
+    В отличие от EmotionAnalyzer хранит состояние между вызовами:
+    экземпляр используется из одного потока (например, рабочего потока
+    AnalysisScheduler), анализатор под ним при этом может быть общим.
+    """
+
+    SENTENCE_END_RE = re.compile(r'[.!?…]+\s*')
+
+    def __init__(self, analyzer: EmotionAnalyzer, spans: bool = False):
+        """
+        Args:
+            analyzer: анализатор, чьи словарь и кэш используются
+            spans: добавлять в результат позиции найденных слов
+                (как analyze(text, spans=True))
+        """
+        self.analyzer = analyzer
+        self.spans = spans
+        self._segments: Dict[str, tuple] = {}
+        # Сколько предложений пересканировано при последнем вызове
+        self.last_rescanned = 0
+
+        # Словарь, для которого собран кэш предложений
+        self._lexicon = None
+        self._splittable = False
+
+    def analyze(self, text: str) -> Dict[str, any]:
+        """Анализ текста; результат как у EmotionAnalyzer.analyze"""
+        lexicon = self.analyzer._lexicon
+        if lexicon is not self._lexicon:
+            # Словарь подменён: кэш предложений устарел
+            self._lexicon = lexicon
+            self._segments = {}
+            # Словарь со знаками конца предложения сломал бы границы
+            self._splittable = not any(
+                ch in pattern for pattern in lexicon.matcher.patterns for ch in '.!?…'
+            )
+
+        if not self._splittable:
+            return self.analyzer.analyze(text, spans=self.spans)
+        if not text or not text.strip():
+            return self.analyzer.analyze(text, spans=self.spans)
+
+        hits = {}
+        first_pos = {}
+        negated = set()
+        found = []
+        segments = {}
+        offset = 0
+        self.last_rescanned = 0
+
+        for segment in self._split(text.lower()):
+            summary = segments.get(segment)
+            if summary is None:
+                summary = self._segments.get(segment)
+            if summary is None:
+                segment_spans = [] if self.spans else None
+                summary = self.analyzer._scan(segment, lexicon, segment_spans) + (segment_spans,)
+                self.last_rescanned += 1
+            segments[segment] = summary
+
+            # Сводим: слова по порядку, первые вхождения со смещением
+            segment_hits, segment_first, segment_negated, segment_spans = summary
+            for emotion, sequence in segment_hits.items():
+                hits.setdefault(emotion, []).extend(sequence)
+            for phrase, pos in segment_first.items():
+                if phrase not in first_pos:
+                    first_pos[phrase] = offset + pos
+            negated |= segment_negated
+            if self.spans:
+                found.extend((offset + start, offset + end, kind, emotion, phrase)
+                             for start, end, kind, emotion, phrase in segment_spans)
+            offset += len(segment)
+
+        # В кэше остаются только предложения текущего текста
+        self._segments = segments
+        result = self.analyzer._score(hits, first_pos, negated, lexicon)
+
+        # Сохранение того же текста возьмёт результат из кэша analyze()
+        self.analyzer._remember(self.analyzer._memo_key(text, lexicon), result)
+        if self.spans:
+            result['spans'] = self.analyzer._span_dicts(found, negated)
+        return result
+
+    def _split(self, text: str) -> Iterator[str]:
+        """Разбиение текста на предложения"""
+        start = 0
+        for match in self.SENTENCE_END_RE.finditer(text):
+            yield text[start:match.end()]
+            start = match.end()
+        if start < len(text):
+            yield text[start:]
+
+    def reset(self):
+        """Сброс кэша (например, при открытии другой записи)"""
+        self._segments = {}
+
+
+# ===== Процессы пула analyze_many =====
+
+_worker_analyzer: Optional[EmotionAnalyzer] = None
+
+
+def _init_worker(analyzer_class: type, stemming: bool, lexicon_paths: List[str],
+                 cache_dir: Optional[str]):
+    """Создание анализатора один раз на процесс пула (словарь — из cache_dir)"""
+    global _worker_analyzer
+    _worker_analyzer = analyzer_class(stemming=stemming, lexicon_paths=lexicon_paths,
+                                      cache_dir=cache_dir)
+
+
+def _analyze_in_worker(text: str) -> Dict[str, any]:
+    """Анализ одного текста в процессе пула"""
+    return _worker_analyzer.analyze(text)
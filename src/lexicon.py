@@ -0,0 +1,339 @@
+"""
+Словари эмоций: загрузка из файлов, компиляция и кэш скомпилированных
+"""
+
+import glob
+import json
+import os
+import re
+from array import array
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from src.phrase_matcher import PhraseMatcher
+from src.stem_lexicon import StemLexicon
+from src.utils import array_from_bytes, array_to_bytes, pack_blocks, unpack_blocks
+
+
+class Lexicon:
+    """
+    Исходный словарь: слова эмоций, интенсификаторы и отрицания
+
+    Файл словаря — JSON, все разделы необязательны:
+
+        {
+            "emotions": {"joy": ["кайфово", "огонь"], "sadness": ["хандра"]},
+            "intensifiers": {"жутко": 1.4},
+            "negations": ["вовсе не"]
+        }
+
+    Файлы дополняют встроенный словарь: слова добавляются в конец
+    списков эмоций, множители интенсификаторов переопределяются.
+    """
+
+    # Пользовательский файл применяется последним, после языковых
+    USER_FILE = "user.json"
+
+    def __init__(self, emotion_words: Dict[str, List[str]],
+                 intensifiers: Dict[str, float], negations: List[str]):
+        self.emotion_words = emotion_words
+        self.intensifiers = intensifiers
+        self.negations = negations
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Lexicon':
+        """
+        Загрузка словаря из JSON-файла
+
+        Raises:
+            OSError: файл не читается
+            ValueError: файл не является словарём в описанном формате
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: некорректный JSON ({e})") from e
+
+        if not isinstance(data, dict):
+            raise ValueError(f"{path}: ожидается объект JSON")
+
+        emotions = data.get('emotions', {})
+        intensifiers = data.get('intensifiers', {})
+        negations = data.get('negations', [])
+        if not isinstance(emotions, dict) or not all(isinstance(w, list) for w in emotions.values()):
+            raise ValueError(f"{path}: 'emotions' — объект вида эмоция → список слов")
+        if not isinstance(intensifiers, dict) or not all(
+                isinstance(m, (int, float)) and not isinstance(m, bool) for m in intensifiers.values()):
+            raise ValueError(f"{path}: 'intensifiers' — объект вида слово → множитель")
+        if not isinstance(negations, list):
+            raise ValueError(f"{path}: 'negations' — список слов")
+
+        return cls(
+            {emotion: cls._clean_words(path, words) for emotion, words in emotions.items()},
+            {word: float(multiplier) for word, multiplier in
+             zip(cls._clean_words(path, list(intensifiers)), intensifiers.values())},
+            cls._clean_words(path, negations),
+        )
+
+    @staticmethod
+    def _clean_words(path: str, words: List) -> List[str]:
+        """Проверка и приведение слов к нижнему регистру"""
+        cleaned = []
+        for word in words:
+            if not isinstance(word, str) or not word.strip() or "\0" in word:
+                raise ValueError(f"{path}: некорректное слово {word!r}")
+            cleaned.append(word.strip().lower())
+        return cleaned
+
+    def merged(self, other: 'Lexicon') -> 'Lexicon':
+        """Новый словарь: этот, дополненный other"""
+        emotion_words = {emotion: list(words) for emotion, words in self.emotion_words.items()}
+        for emotion, words in other.emotion_words.items():
+            emotion_words[emotion] = list(dict.fromkeys(emotion_words.get(emotion, []) + words))
+
+        intensifiers = dict(self.intensifiers)
+        intensifiers.update(other.intensifiers)
+
+        negations = list(dict.fromkeys(self.negations + other.negations))
+        return Lexicon(emotion_words, intensifiers, negations)
+
+    @classmethod
+    def discover(cls, directory: str) -> List[str]:
+        """
+        Файлы словарей в каталоге: языковые (ru.json, en.json, ...) по
+        алфавиту, затем пользовательский user.json
+        """
+        paths = sorted(glob.glob(os.path.join(directory, "*.json")))
+        user = [p for p in paths if os.path.basename(p) == cls.USER_FILE]
+        return [p for p in paths if p not in user] + user
+
+    @staticmethod
+    def snapshot(paths: List[str]) -> Tuple:
+        """Состояние файлов (размер и время изменения) для отслеживания правок"""
+        state = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                state.append((path, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                state.append((path, None, None))
+        return tuple(state)
+
+
+class CompiledLexicon:
+    """
+    Скомпилированный словарь — всё, что нужно анализатору на проходе
+
+    Автомат поиска, роли строк словаря, точные словоформы и основы.
+    После сборки не меняется (словари и списки хранятся в неизменяемых
+    обёртках): анализатор подменяет его целиком одним присваиванием,
+    поэтому идущий анализ всегда видит согласованное состояние, а один
+    объект можно читать из любого числа потоков без блокировок.
+
+    Сохраняется в бинарный файл под ключом — хешем исходных файлов
+    словаря: при совпадении ключа JSON не разбирается, а автомат не
+    строится, что для большого словаря на порядок быстрее сборки.
+    """
+
+    # Формат файла: сигнатура, ключ, версия, интенсификаторы, блоки
+    # автомата, блоки ролей, блоки основ (если собраны)
+    MAGIC = b"MJLEX01\0"
+    CACHE_PREFIX = "lexicon-"
+    CACHE_SUFFIX = ".bin"
+    # Сколько файлов кэша хранится в каталоге (последние по времени)
+    CACHE_KEEP = 4
+
+    WORD_RE = re.compile(r'\w+')
+
+    def __init__(self, version: str, intensifiers: Dict[str, float],
+                 matcher: PhraseMatcher, roles: List[Tuple[Tuple[Tuple[str, int], ...], bool]],
+                 exact_words: Set[str], stems: Optional[StemLexicon] = None):
+        """
+        Args:
+            version: версия анализатора для этого словаря
+            intensifiers: интенсификатор → множитель (порядок важен)
+            matcher: автомат по всем строкам словаря
+            roles: для каждой строки matcher.patterns —
+                ((эмоция, порядок слова), ...) и является ли отрицанием
+            exact_words: однословные слова эмоций (по основам не ищутся)
+            stems: основы для поиска словоформ (None — без основ)
+        """
+        self.version = version
+        self.intensifiers: Mapping[str, float] = MappingProxyType(dict(intensifiers))
+        self.matcher = matcher
+        self.roles = tuple(roles)
+        self.exact_words = frozenset(exact_words)
+        self.stems = stems
+
+    @classmethod
+    def compile(cls, lexicon: Lexicon, version: str, stemming: bool) -> 'CompiledLexicon':
+        """Сборка из исходного словаря"""
+        # Роль каждой строки: (эмоции с порядком в списке, отрицание ли)
+        roles = {}
+        for emotion, words in lexicon.emotion_words.items():
+            for order, phrase in enumerate(words):
+                roles.setdefault(phrase.lower(), ([], [False]))[0].append((emotion, order))
+        for intensifier in lexicon.intensifiers:
+            roles.setdefault(intensifier, ([], [False]))
+        for negation in lexicon.negations:
+            roles.setdefault(negation, ([], [False]))[1][0] = True
+
+        matcher = PhraseMatcher(roles)
+        stems = None
+        if stemming:
+            stems = StemLexicon.from_words(
+                {emotion: {'words': words} for emotion, words in lexicon.emotion_words.items()}
+            )
+        return cls(
+            version,
+            dict(lexicon.intensifiers),
+            matcher,
+            [(tuple(roles[p][0]), roles[p][1][0]) for p in matcher.patterns],
+            {p for p in roles if roles[p][0] and cls.WORD_RE.fullmatch(p)},
+            stems,
+        )
+
+    # ===== Бинарный файл =====
+
+    @classmethod
+    def cache_path(cls, cache_dir: str, source_key: str) -> str:
+        """Путь к файлу скомпилированного словаря с данным ключом"""
+        return os.path.join(cache_dir, f"{cls.CACHE_PREFIX}{source_key}{cls.CACHE_SUFFIX}")
+
+    def _role_blocks(self) -> List[bytes]:
+        """
+        Роли строк: эмоции, коды (номер эмоции << 24 | порядок),
+        границы кодов каждой строки, флаги (отрицание, точное слово)
+
+        Raises:
+            ValueError: эмоций больше 256 или слов эмоции больше 2^24
+        """
+        emotions = sorted({e for entries, _ in self.roles for e, _ in entries})
+        if len(emotions) > 0x100:
+            raise ValueError(f"Слишком много эмоций для словаря: {len(emotions)}")
+        emotion_ids = {e: i for i, e in enumerate(emotions)}
+
+        codes = array('I')
+        offsets = array('I', [0])
+        flags = bytearray()
+        for pattern, (entries, is_negation) in zip(self.matcher.patterns, self.roles):
+            for emotion, order in entries:
+                if order > 0xFFFFFF:
+                    raise ValueError(f"Слишком много слов эмоции {emotion}: {order + 1}")
+                codes.append(emotion_ids[emotion] << 24 | order)
+            offsets.append(len(codes))
+            flags.append(is_negation | (pattern in self.exact_words) << 1)
+
+        return [
+            "\n".join(emotions).encode('utf-8'),
+            array_to_bytes(codes),
+            array_to_bytes(offsets),
+            bytes(flags),
+        ]
+
+    def save(self, path: str, source_key: str):
+        """
+        Сохранение в бинарный файл
+
+        Файл пишется во временный и подменяется атомарно. В каталоге
+        остаются CACHE_KEEP последних файлов кэша, более старые удаляются:
+        встроенный словарь и словари из файлов кэшируются под разными
+        ключами и не вытесняют друг друга.
+        """
+        blocks = [
+            source_key.encode('ascii'),
+            self.version.encode('ascii'),
+            json.dumps(list(self.intensifiers.items()), ensure_ascii=False).encode('utf-8'),
+        ]
+        blocks += self.matcher.to_blocks()
+        blocks += self._role_blocks()
+        if self.stems is not None:
+            blocks += self.stems.to_blocks()
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        part_path = path + ".part"
+        with open(part_path, "wb") as f:
+            f.write(self.MAGIC)
+            f.write(pack_blocks(blocks))
+        os.replace(part_path, path)
+
+        others = []
+        for other in glob.glob(os.path.join(directory, f"{self.CACHE_PREFIX}*{self.CACHE_SUFFIX}")):
+            if os.path.abspath(other) == os.path.abspath(path):
+                continue
+            try:
+                others.append((os.path.getmtime(other), other))
+            except OSError:
+                pass
+        others.sort(reverse=True)
+        for _, stale in others[self.CACHE_KEEP - 1:]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    @classmethod
+    def load(cls, path: str, source_key: str) -> Optional['CompiledLexicon']:
+        """
+        Загрузка из бинарного файла
+
+        Returns:
+            CompiledLexicon или None, если файла нет, он повреждён или
+            собран из других файлов словаря (другой source_key)
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if not data.startswith(cls.MAGIC):
+            return None
+        try:
+            blocks = unpack_blocks(data, len(cls.MAGIC))
+            if not blocks or blocks[0] != source_key.encode('ascii'):
+                return None
+
+            matcher_end = 3 + PhraseMatcher.BLOCK_COUNT
+            roles_end = matcher_end + 4
+            if len(blocks) not in (roles_end, roles_end + StemLexicon.BLOCK_COUNT):
+                return None
+
+            matcher = PhraseMatcher.from_blocks(blocks[3:matcher_end])
+            roles, exact_words = cls._roles_from_blocks(matcher, blocks[matcher_end:roles_end])
+            stems = StemLexicon.from_blocks(blocks[roles_end:]) if len(blocks) > roles_end else None
+            compiled = cls(
+                blocks[1].decode('ascii'),
+                dict(json.loads(blocks[2].decode('utf-8'))),
+                matcher, roles, exact_words, stems,
+            )
+        except (ValueError, TypeError, IndexError, UnicodeDecodeError):
+            return None
+
+        # Использованный файл — свежий: save() удаляет самые старые
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return compiled
+
+    @staticmethod
+    def _roles_from_blocks(matcher: PhraseMatcher, blocks: List[bytes]) -> Tuple[List, Set[str]]:
+        """Роли и точные слова из блоков _role_blocks"""
+        emotions = blocks[0].decode('utf-8').split("\n")
+        codes = array_from_bytes('I', blocks[1]).tolist()
+        offsets = array_from_bytes('I', blocks[2]).tolist()
+        flags = blocks[3]
+        patterns = matcher.patterns
+        if len(flags) != len(patterns) or len(offsets) != len(patterns) + 1:
+            raise ValueError("Роли собраны для другого автомата")
+
+        entries = [(emotions[code >> 24], code & 0xFFFFFF) for code in codes]
+        roles = [
+            (tuple(entries[begin:end]), (flag & 1) == 1)
+            for begin, end, flag in zip(offsets, offsets[1:], flags)
+        ]
+        exact_words = {pattern for pattern, flag in zip(patterns, flags) if flag & 2}
+        return roles, exact_words
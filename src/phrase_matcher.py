@@ -0,0 +1,178 @@
+"""
+Поиск множества фраз за один проход (автомат Ахо-Корасик)
+"""
+
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+from src.utils import array_from_bytes, array_to_bytes
+
+
+class PhraseMatcher:
+    """
+    Автомат Ахо-Корасик по набору строк
+
+    Строится один раз. Поиск проходит текст посимвольно и находит все
+    вхождения всех строк, включая вложенные и перекрывающиеся, поэтому
+    время поиска не зависит от размера словаря. Поиск только читает
+    автомат, поэтому один автомат можно использовать из нескольких
+    потоков.
+
+    Переходы бора хранятся в одном dict с целыми ключами
+    (состояние << 21 | код символа), суффиксные ссылки — массивом:
+    так автомат на десятки тысяч слов занимает десятки мегабайт и
+    быстро сохраняется/загружается (to_blocks/from_blocks).
+    """
+
+    # Код символа Unicode помещается в 21 бит
+    _SHIFT = 21
+    _MASK = (1 << 21) - 1
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Args:
+            patterns: строки для поиска (повторы и пустые строки игнорируются)
+        """
+        self.patterns: Tuple[str, ...] = tuple(dict.fromkeys(p for p in patterns if p))
+        self._build()
+
+    def _build(self):
+        """Построение бора, суффиксных ссылок и выходов"""
+        shift = self._SHIFT
+        trans: Dict[int, int] = {}
+        outputs: Dict[int, List[int]] = {}
+        count = 1
+
+        # Бор
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                key = state << shift | ord(ch)
+                nxt = trans.get(key)
+                if nxt is None:
+                    nxt = count
+                    count += 1
+                    trans[key] = nxt
+                state = nxt
+            outputs.setdefault(state, []).append(pattern_id)
+
+        children = [[] for _ in range(count)]
+        for key, nxt in trans.items():
+            children[key >> shift].append((key & self._MASK, nxt))
+
+        # Суффиксные ссылки в порядке обхода в ширину; выходы состояния
+        # дополняются выходами его суффиксной ссылки
+        fail = array('i', bytes(4 * count))
+        queue = deque(nxt for _, nxt in children[0])
+        while queue:
+            state = queue.popleft()
+            for code, nxt in children[state]:
+                queue.append(nxt)
+                if state:
+                    link = fail[state]
+                    while True:
+                        target = trans.get(link << shift | code)
+                        if target is not None:
+                            fail[nxt] = target
+                            break
+                        if not link:
+                            break
+                        link = fail[link]
+                inherited = outputs.get(fail[nxt])
+                if inherited:
+                    outputs.setdefault(nxt, []).extend(inherited)
+
+        self._trans = trans
+        self._fail = fail
+        self._outputs: Dict[int, Tuple[int, ...]] = {
+            state: tuple(ids) for state, ids in outputs.items()
+        }
+
+    @property
+    def state_count(self) -> int:
+        """Количество состояний автомата"""
+        return len(self._fail)
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Все вхождения строк в текст
+
+        Returns:
+            Список (конец вхождения, номер строки в patterns) в порядке
+            концов; начало = конец - длина строки
+        """
+        shift = self._SHIFT
+        trans = self._trans
+        fail = self._fail
+        outputs = self._outputs
+        found = []
+        state = 0
+        for pos, ch in enumerate(text, 1):
+            code = ord(ch)
+            while True:
+                nxt = trans.get(state << shift | code)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            out = outputs.get(state)
+            if out:
+                for pattern_id in out:
+                    found.append((pos, pattern_id))
+        return found
+
+    # ===== Сериализация =====
+
+    BLOCK_COUNT = 7
+
+    def to_blocks(self) -> List[bytes]:
+        """
+        Автомат в виде бинарных блоков: строки через '\\0', ключи и
+        значения переходов, суффиксные ссылки, выходы (состояния,
+        границы списков, номера строк)
+        """
+        output_states = array('i', self._outputs.keys())
+        output_offsets = array('i', [0])
+        output_ids = array('i')
+        for ids in self._outputs.values():
+            output_ids.extend(ids)
+            output_offsets.append(len(output_ids))
+
+        return [
+            "\0".join(self.patterns).encode('utf-8'),
+            array_to_bytes(array('q', self._trans.keys())),
+            array_to_bytes(array('i', self._trans.values())),
+            array_to_bytes(self._fail),
+            array_to_bytes(output_states),
+            array_to_bytes(output_offsets),
+            array_to_bytes(output_ids),
+        ]
+
+    @classmethod
+    def from_blocks(cls, blocks: List[bytes]) -> 'PhraseMatcher':
+        """Автомат из блоков to_blocks (ValueError при несогласованных данных)"""
+        if len(blocks) != cls.BLOCK_COUNT:
+            raise ValueError("Неверное число блоков автомата")
+
+        matcher = cls.__new__(cls)
+        matcher.patterns = tuple(blocks[0].decode('utf-8').split("\0")) if blocks[0] else ()
+
+        keys = array_from_bytes('q', blocks[1])
+        values = array_from_bytes('i', blocks[2])
+        if len(keys) != len(values):
+            raise ValueError("Повреждённая таблица переходов")
+        matcher._trans = dict(zip(keys, values))
+        matcher._fail = array_from_bytes('i', blocks[3])
+
+        states = array_from_bytes('i', blocks[4])
+        offsets = array_from_bytes('i', blocks[5]).tolist()
+        ids = array_from_bytes('i', blocks[6]).tolist()
+        if len(offsets) != len(states) + 1:
+            raise ValueError("Повреждённая таблица выходов")
+        matcher._outputs = dict(zip(states, [
+            tuple(ids[begin:end]) for begin, end in zip(offsets, offsets[1:])
+        ]))
+        return matcher
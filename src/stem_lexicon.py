@@ -0,0 +1,209 @@
+"""
+Словарь основ для распознавания словоформ русских слов
+"""
+
+from array import array
+from typing import Dict, Iterable, List, Tuple
+
+from src.utils import array_from_bytes, array_to_bytes
+
+
+def _russian_endings() -> List[str]:
+    """Окончания, отсекаемые стеммером"""
+    nominal = [
+        # Существительные
+        'а', 'я', 'о', 'е', 'ь', 'ы', 'и', 'у', 'ю', 'ом', 'ем', 'ой', 'ей',
+        'ою', 'ею', 'ам', 'ям', 'ами', 'ями', 'ах', 'ях', 'ов', 'ев', 'ью',
+        'ия', 'ие', 'ий', 'ию', 'ием', 'иям', 'иями', 'иях',
+        # Прилагательные и причастия
+        'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ого', 'его', 'ому', 'ему',
+        'ым', 'им', 'ую', 'юю', 'ых', 'их', 'ыми', 'ими',
+    ]
+    verbal = [
+        'ть', 'ти', 'л', 'ла', 'ло', 'ли', 'ю', 'у', 'ешь', 'ет', 'ем', 'ете',
+        'ут', 'ют', 'ишь', 'ит', 'им', 'ите', 'ат', 'ят', 'ал', 'ала', 'али',
+    ]
+    # Возвратные формы: устал → усталась, боюсь, злится
+    reflexive = [e + r for e in verbal for r in ('ся', 'сь')] + ['ся', 'сь']
+    return sorted(set(nominal + verbal + reflexive))
+
+
+class StemLexicon:
+    """
+    Основы слов словаря эмоций и дерево окончаний
+
+    Слово делится на основу и окончание обходом дерева окончаний с
+    конца слова, найденные основы проверяются одним поиском в dict.
+    Так 'радостная', 'радостью', 'устала' находятся по основам слов
+    словаря без перечисления всех форм. Обрабатываются только слова
+    на кириллице.
+    """
+
+    ENDINGS = _russian_endings()
+
+    # Короче основа не бывает: трёхбуквенные основы ловят чужие слова
+    # ('гор' из 'горе' — 'горы', 'зол' — 'зола', 'маг' из 'магия' — 'мага')
+    MIN_STEM = 4
+
+    # Слова словаря, которые не склоняются по основе: междометия, чьи
+    # «формы» — другие слова ('класс' — 'классе', 'блин' — 'блины')
+    UNINFLECTED = frozenset({'класс', 'блин', 'супер', 'ура', 'вау', 'йес', 'ого'})
+
+    # Словоформы, которые совпадают с основой слова словаря, но эмоцией
+    # не являются ('обычно' — не 'обычный')
+    EXCLUDED_FORMS = frozenset({'обычно'})
+
+    _END = ""
+
+    def __init__(self, stems: Dict[str, Tuple[Tuple[str, int], ...]],
+                 endings: Iterable[str] = None):
+        """
+        Args:
+            stems: основа → ((эмоция, порядок слова в списке эмоции), ...)
+            endings: окончания (по умолчанию ENDINGS)
+        """
+        self.stems = stems
+        self.endings = sorted(set(endings if endings is not None else self.ENDINGS))
+
+        # Дерево окончаний, записанных с конца
+        trie = {}
+        for ending in self.endings:
+            node = trie
+            for ch in reversed(ending):
+                node = node.setdefault(ch, {})
+            node[self._END] = len(ending)
+        self._trie = trie
+        self._max_ending = max((len(e) for e in self.endings), default=0)
+
+    @staticmethod
+    def _is_cyrillic(word: str) -> bool:
+        return 'а' <= word[0] <= 'я' or word[0] == 'ё'
+
+    def _ending_lengths(self, word: str) -> List[int]:
+        """Длины окончаний, которыми кончается слово (по возрастанию)"""
+        lengths = [0]
+        node = self._trie
+        for ch in reversed(word[-self._max_ending:]):
+            node = node.get(ch)
+            if node is None:
+                break
+            if self._END in node:
+                lengths.append(node[self._END])
+        return lengths
+
+    def stems_of(self, word: str) -> List[str]:
+        """
+        Все возможные основы слова (от самой длинной)
+
+        Окончания неоднозначны: 'радость' — это 'радост|ь' и 'радос|ть',
+        поэтому слово словаря регистрируется под каждой основой не
+        короче MIN_STEM.
+        """
+        if not word or not self._is_cyrillic(word):
+            return [word] if word else []
+        return [
+            word[:len(word) - length] for length in self._ending_lengths(word)
+            if len(word) - length >= self.MIN_STEM
+        ] or [word]
+
+    def lookup(self, token: str) -> Tuple[Tuple[str, int], ...]:
+        """
+        Эмоции словоформы
+
+        Проверяются все разбиения токена на основу и окончание,
+        начиная с самой длинной основы.
+
+        Returns:
+            ((эмоция, порядок), ...) или пустой кортеж
+        """
+        if not token or not self._is_cyrillic(token) or token in self.EXCLUDED_FORMS:
+            return ()
+        stems = self.stems
+        for length in self._ending_lengths(token):
+            stem_length = len(token) - length
+            if stem_length < self.MIN_STEM:
+                break
+            entries = stems.get(token[:stem_length])
+            if entries:
+                return entries
+        return ()
+
+    @classmethod
+    def from_words(cls, emotion_words: Dict[str, Dict]) -> 'StemLexicon':
+        """
+        Сборка по словарю вида EmotionAnalyzer.EMOTION_WORDS
+
+        Берутся только однословные слова на кириллице, кроме UNINFLECTED:
+        их находит только точное совпадение.
+        """
+        builder = cls({})
+        stems = {}
+        for emotion, data in emotion_words.items():
+            for order, word in enumerate(data['words']):
+                word = word.lower()
+                if not word.isalpha() or not cls._is_cyrillic(word) or word in cls.UNINFLECTED:
+                    continue
+                for stem in builder.stems_of(word):
+                    entries = stems.setdefault(stem, [])
+                    if all(e != emotion for e, _ in entries):
+                        entries.append((emotion, order))
+        return cls({stem: tuple(entries) for stem, entries in stems.items()})
+
+    # ===== Бинарный файл =====
+
+    BLOCK_COUNT = 4
+
+    def to_blocks(self) -> List[bytes]:
+        """
+        Словарь в виде бинарных блоков
+
+        Основы и окончания хранятся UTF-8 блоками через '\\n', эмоции
+        основ — массивом uint32 (номер эмоции << 24 | порядок слова).
+
+        Raises:
+            ValueError: эмоций больше 256 или слов эмоции больше 2^24
+        """
+        emotions = sorted({e for entries in self.stems.values() for e, _ in entries})
+        if len(emotions) > 0x100:
+            raise ValueError(f"Слишком много эмоций для словаря основ: {len(emotions)}")
+        emotion_ids = {e: i for i, e in enumerate(emotions)}
+
+        stem_list = []
+        codes = array('I')
+        for stem, entries in self.stems.items():
+            for emotion, order in entries:
+                if order > 0xFFFFFF:
+                    raise ValueError(f"Слишком много слов эмоции {emotion}: {order + 1}")
+                stem_list.append(stem)
+                codes.append(emotion_ids[emotion] << 24 | order)
+
+        return [
+            "\n".join(emotions).encode('utf-8'),
+            "\n".join(self.endings).encode('utf-8'),
+            "\n".join(stem_list).encode('utf-8'),
+            array_to_bytes(codes),
+        ]
+
+    @classmethod
+    def from_blocks(cls, blocks: List[bytes]) -> 'StemLexicon':
+        """Словарь из блоков to_blocks (ValueError при несогласованных данных)"""
+        if len(blocks) != cls.BLOCK_COUNT:
+            raise ValueError("Неверное число блоков словаря основ")
+
+        emotions = blocks[0].decode('utf-8').split("\n")
+        endings = blocks[1].decode('utf-8').split("\n") if blocks[1] else []
+        stem_list = blocks[2].decode('utf-8').split("\n") if blocks[2] else []
+        codes = array_from_bytes('I', blocks[3])
+        if len(codes) != len(stem_list):
+            raise ValueError("Повреждённая таблица основ")
+
+        # Различных кодов немного — кортежи создаются один раз на код
+        table = {code: ((emotions[code >> 24], code & 0xFFFFFF),) for code in set(codes)}
+        entries = list(map(table.__getitem__, codes))
+        stems = dict(zip(stem_list, entries))
+        if len(stems) != len(stem_list):
+            # Основа с несколькими эмоциями записана несколько раз подряд
+            stems = {}
+            for stem, entry in zip(stem_list, entries):
+                stems[stem] = stems.get(stem, ()) + entry
+        return cls(stems, endings)
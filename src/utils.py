@@ -4,8 +4,12 @@
 
 from datetime import datetime, date, timedelta
 from typing import List, Tuple
+import hashlib
 import json
 import os
+import struct
+import sys
+from array import array
 
 
 def get_date_range(period: str) -> Tuple[date, date]:
@@ -69,6 +73,48 @@ def truncate_text(text: str, max_length: int = 100) -> str:
     return text[:max_length - 3] + '...'
 
 
+def content_hash(text: str) -> str:
+    """Хеш текста записи (ключ кэша анализа и колонка entries.content_hash)"""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def pack_blocks(blocks: List[bytes]) -> bytes:
+    """Склейка бинарных блоков, каждый с длиной (uint32 LE) впереди"""
+    return b"".join(struct.pack("<I", len(block)) + block for block in blocks)
+
+
+def unpack_blocks(data: bytes, offset: int = 0) -> List[bytes]:
+    """Разбор блоков pack_blocks начиная с offset (ValueError при повреждении)"""
+    blocks = []
+    while offset < len(data):
+        if offset + 4 > len(data):
+            raise ValueError("Повреждённые данные: обрезан заголовок блока")
+        (size,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        if offset + size > len(data):
+            raise ValueError("Повреждённые данные: обрезан блок")
+        blocks.append(data[offset:offset + size])
+        offset += size
+    return blocks
+
+
+def array_to_bytes(values: array) -> bytes:
+    """Байты массива в порядке little-endian (формат файлов не зависит от платформы)"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def array_from_bytes(typecode: str, data: bytes) -> array:
+    """Массив из байтов array_to_bytes"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
 def get_greeting() -> str:
     """Получение приветствия в зависимости от времени суток"""
     hour = datetime.now().hour
@@ -0,0 +1,363 @@
+"""
+Векторный подсчёт эмоций для большого числа текстов (NumPy)
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.emotion_analyzer import EmotionAnalyzer
+from src.lexicon import CompiledLexicon
+
+
+class _LexiconTables:
+    """
+    Таблицы словаря для векторного подсчёта
+
+    Однословные слова эмоций получают целые коды; разреженная матрица
+    слово × эмоция хранится в формате CSR (границы строк и номера
+    эмоций). Собирается один раз на скомпилированный словарь.
+    """
+
+    WORD_RE = re.compile(r'\w+')
+
+    def __init__(self, lexicon: CompiledLexicon, emotions: List[str]):
+        self.lexicon = lexicon
+        emotion_ids = {e: i for i, e in enumerate(emotions)}
+
+        self.codes: Dict[str, int] = {}
+        self.phrases: List[str] = []
+        lengths = []
+        indices = []
+        multiword = []
+        for pattern, (entries, _) in zip(lexicon.matcher.patterns, lexicon.roles):
+            if not entries:
+                continue
+            if pattern not in lexicon.exact_words:
+                multiword.append(pattern)
+                continue
+            # Слово, повторённое в списке эмоции, засчитывается один раз
+            row = list(dict.fromkeys(emotion_ids[e] for e, _ in entries))
+            self.codes[pattern] = len(self.phrases)
+            self.phrases.append(pattern)
+            lengths.append(len(row))
+            indices.extend(row)
+
+        self.lengths = np.array(lengths, dtype=np.intp)
+        self.indices = np.array(indices, dtype=np.intp)
+        self.pattern_set: Set[str] = set(lexicon.matcher.patterns)
+
+        # Тексты с фразами из нескольких слов считаются обычным проходом
+        self.multiword_re = self._alternation(multiword, r'(?:{})')
+
+        # Начала отрицаний, за которыми идёт пробел (с перекрытиями)
+        self.negations = [p for p, (_, is_negation) in
+                          zip(lexicon.matcher.patterns, lexicon.roles) if is_negation]
+        # Захватывается самое длинное отрицание с пробелом после него;
+        # остальные, начинающиеся там же, — его префиксы
+        self.negation_re = self._alternation(self.negations, r'(?<!\w)(?=({})\s)')
+        self.negation_prefixes = {
+            negation: [p for p in self.negations if negation.startswith(p)]
+            for negation in self.negations
+        }
+
+        self.intensifiers = list(lexicon.intensifiers)
+        self.multipliers = np.array(list(lexicon.intensifiers.values()), dtype=np.float64)
+
+    @staticmethod
+    def _alternation(phrases: List[str], template: str) -> Optional['re.Pattern']:
+        if not phrases:
+            return None
+        alternatives = '|'.join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+        return re.compile(template.format(alternatives))
+
+
+class VectorScorer:
+    """
+    Подсчёт all_emotions для тысяч текстов за один вызов
+
+    Тексты разбиваются на слова, слова переводятся в коды словаря,
+    вклад каждого вхождения — 1, множители интенсификаторов и
+    отрицаний накладываются масками над парами (текст, слово), а
+    суммы по эмоциям и нормализация считаются матричными операциями
+    NumPy.
+
+    Результат совпадает с analyze()['all_emotions'] бит в бит:
+    позиции первых вхождений берутся как в analyze (подстрокой),
+    суммы накапливаются в порядке появления слов. Тексты с фразами
+    словаря из нескольких слов ('ничего себе') считаются обычным
+    проходом анализатора.
+
+    В Python остаются поиск позиций слов, окон отрицаний и
+    интенсификаторов в каждом тексте; попадание в окна проверяется
+    для всех текстов разом (searchsorted). На корпусе benchmarks
+    выигрыш относительно analyze() — около 1.7–2x, не на порядок.
+    """
+
+    def __init__(self, analyzer: EmotionAnalyzer):
+        self.analyzer = analyzer
+        # Порядок столбцов результата
+        self.emotions = analyzer.get_all_emotions()
+        self._tables: Optional[_LexiconTables] = None
+
+    def _tables_for(self, lexicon: CompiledLexicon) -> _LexiconTables:
+        """Таблицы текущего словаря (пересобираются после его подмены)"""
+        tables = self._tables
+        if tables is None or tables.lexicon is not lexicon:
+            tables = self._tables = _LexiconTables(lexicon, self.emotions)
+        return tables
+
+    def score(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Оценки эмоций для набора текстов
+
+        Returns:
+            Матрица len(texts) × len(self.emotions); строка i равна
+            analyze(texts[i])['all_emotions'] в порядке self.emotions
+        """
+        # Словарь читается один раз: подмена посреди вызова не видна
+        scores, fallback = self._sums(texts, self.analyzer._lexicon)
+        self._normalize(scores)
+        for doc, result in fallback.items():
+            scores[doc] = [result['all_emotions'][e] for e in self.emotions]
+        return scores
+
+    def analyze(self, texts: Sequence[str]) -> List[Dict[str, any]]:
+        """
+        Результаты как у analyze() (без spans) для набора текстов
+
+        Главная эмоция и интенсивность выбираются _build_result по
+        суммам строки — так же, как в analyze().
+        """
+        analyzer = self.analyzer
+        lexicon = analyzer._lexicon
+        scores, fallback = self._sums(texts, lexicon)
+        results = []
+        for doc, row in enumerate(scores.tolist()):
+            result = fallback.get(doc)
+            if result is None:
+                result = analyzer._build_result(dict(zip(self.emotions, row)))
+                result['version'] = lexicon.version
+            results.append(result)
+        return results
+
+    def _sums(self, texts: Sequence[str], lexicon: CompiledLexicon) -> Tuple[np.ndarray, Dict[int, Dict]]:
+        """
+        Суммы вкладов по эмоциям до нормализации
+
+        Returns:
+            (матрица len(texts) × len(self.emotions), результаты
+            _score для текстов, посчитанных обычным проходом)
+        """
+        analyzer = self.analyzer
+        tables = self._tables_for(lexicon)
+        n_docs = len(texts)
+        n_emotions = len(self.emotions)
+        scores = np.zeros((n_docs, n_emotions))
+        if not n_docs:
+            return scores, {}
+
+        # Коды слов этого вызова: словарь + словоформы по основам
+        vocab = dict(tables.codes)
+        phrases = list(tables.phrases)
+        base_codes = len(phrases)
+        extra_lengths = []
+        extra_indices = []
+        stems = lexicon.stems
+        emotion_ids = {e: i for i, e in enumerate(self.emotions)}
+        word_findall = tables.WORD_RE.findall
+        multiword_re = tables.multiword_re
+
+        lowered = []
+        fallback = []
+        hit_codes = []
+        hit_docs = []
+        for doc, text in enumerate(texts):
+            text_lower = text.lower() if text else ''
+            lowered.append(text_lower)
+            if multiword_re is not None and multiword_re.search(text_lower):
+                fallback.append(doc)
+                continue
+
+            count = 0
+            for token in word_findall(text_lower):
+                code = vocab.get(token)
+                if code is None:
+                    code = -1
+                    if stems is not None:
+                        entries = stems.lookup(token)
+                        if entries:
+                            code = len(phrases)
+                            phrases.append(token)
+                            row = list(dict.fromkeys(emotion_ids[e] for e, _ in entries))
+                            extra_lengths.append(len(row))
+                            extra_indices.extend(row)
+                    vocab[token] = code
+                if code >= 0:
+                    hit_codes.append(code)
+                    count += 1
+            if count:
+                hit_docs.append((doc, count))
+
+        if hit_codes:
+            self._accumulate(
+                scores, tables, lowered, phrases, base_codes,
+                np.array(hit_codes, dtype=np.intp), hit_docs,
+                np.concatenate([tables.lengths, np.array(extra_lengths, dtype=np.intp)]),
+                np.concatenate([tables.indices, np.array(extra_indices, dtype=np.intp)]),
+            )
+
+        return scores, {
+            doc: analyzer._score(*analyzer._scan(lowered[doc], lexicon), lexicon)
+            for doc in fallback
+        }
+
+    def _accumulate(self, scores: np.ndarray, tables: _LexiconTables, lowered: List[str],
+                    phrases: List[str], base_codes: int, codes: np.ndarray,
+                    hit_docs: List[tuple], lengths: np.ndarray, indices: np.ndarray):
+        """Суммы вкладов вхождений по (текст, эмоция)"""
+        n_codes = len(phrases)
+        docs = np.repeat(
+            np.array([doc for doc, _ in hit_docs], dtype=np.intp),
+            np.array([count for _, count in hit_docs], dtype=np.intp),
+        )
+
+        # Пары (текст, слово): у каждой свой множитель
+        pair_keys, pair_of = np.unique(docs * n_codes + codes, return_inverse=True)
+        pair_docs = pair_keys // n_codes
+        pair_codes = pair_keys % n_codes
+
+        word_pos = np.empty(len(pair_keys), dtype=np.intp)
+        int_rows = []
+        # Окна отрицаний и вхождения слов в текстах с отрицаниями — ключами
+        # текст * stride + позиция, чтобы проверить все тексты разом
+        stride = max(len(lowered[doc]) for doc, _ in hit_docs) + 2
+        window_bounds = []
+        occurrence_pairs = []
+        occurrence_keys = []
+        current = -1
+        # Пары отсортированы по тексту: данные текста считаются один раз
+        for k, (doc, code) in enumerate(zip(pair_docs.tolist(), pair_codes.tolist())):
+            if doc != current:
+                current = doc
+                text_lower = lowered[doc]
+                base = doc * stride
+                int_rows.append([text_lower.find(i) for i in tables.intensifiers])
+                windows = self._negation_windows(text_lower, tables)
+                window_bounds.extend((base + lo, base + hi) for lo, hi in windows)
+
+            phrase = phrases[code]
+            if phrase in tables.pattern_set:
+                word_pos[k] = text_lower.find(phrase)
+            else:
+                word_pos[k] = self._find_word(text_lower, phrase, 0)
+
+            if windows:
+                # Слово словаря — любое вхождение подстрокой,
+                # словоформа — только целым словом (как в _scan)
+                if code < base_codes:
+                    pos = text_lower.find(phrase)
+                    while pos >= 0:
+                        occurrence_pairs.append(k)
+                        occurrence_keys.append(base + pos)
+                        pos = text_lower.find(phrase, pos + 1)
+                else:
+                    pos = self._find_word(text_lower, phrase, 0)
+                    while pos >= 0:
+                        occurrence_pairs.append(k)
+                        occurrence_keys.append(base + pos)
+                        pos = self._find_word(text_lower, phrase, pos + 1)
+
+        negated = self._under_negation(len(pair_keys), window_bounds,
+                                       occurrence_pairs, occurrence_keys)
+
+        # Интенсификатор: первый по порядку словаря ближе 20 символов перед словом
+        factor = np.ones(len(pair_keys))
+        if tables.intensifiers:
+            int_pos = np.array(int_rows, dtype=np.intp)[np.unique(pair_docs, return_inverse=True)[1]]
+            distance = word_pos[:, None] - int_pos
+            near = (int_pos >= 0) & (distance > 0) & (distance < 20)
+            has_near = near.any(axis=1)
+            factor[has_near] = tables.multipliers[near.argmax(axis=1)[has_near]]
+        factor[negated] *= -0.5
+
+        # Вхождение × эмоции его слова (строки CSR); порядок вхождений
+        # сохраняется, поэтому суммы складываются как в analyze
+        row_lengths = lengths[codes]
+        row_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])[codes]
+        total = int(row_lengths.sum())
+        shift = np.repeat(row_starts - (np.cumsum(row_lengths) - row_lengths), row_lengths)
+        emotions = indices[shift + np.arange(total)]
+        cells = np.repeat(docs, row_lengths) * scores.shape[1] + emotions
+        values = np.repeat(factor[pair_of], row_lengths)
+        scores += np.bincount(cells, weights=values, minlength=scores.size).reshape(scores.shape)
+
+    @staticmethod
+    def _negation_windows(text_lower: str, tables: _LexiconTables) -> List[Tuple[int, int]]:
+        """
+        Окна отрицаний текста: полуинтервалы позиций, с которых слово
+        считается под отрицанием (как negated_at в _scan)
+        """
+        windows = []
+        if tables.negation_re is None:
+            return windows
+        n = len(text_lower)
+        space_re = EmotionAnalyzer.SPACE_RE
+        word_re = EmotionAnalyzer.WORD_RE
+        for match in tables.negation_re.finditer(text_lower):
+            start = match.start()
+            for negation in tables.negation_prefixes[match.group(1)]:
+                end = start + len(negation)
+                if end < n and text_lower[end].isspace():
+                    window_start = space_re.match(text_lower, end).end()
+                    word = word_re.match(text_lower, window_start)
+                    word_end = word.end() if word else window_start
+                    if word_end > window_start:
+                        windows.append((window_start, word_end))
+                    after = space_re.match(text_lower, word_end).end()
+                    windows.append((after, after + 1))
+        return windows
+
+    @staticmethod
+    def _under_negation(n_pairs: int, window_bounds: List[Tuple[int, int]],
+                        occurrence_pairs: List[int], occurrence_keys: List[int]) -> np.ndarray:
+        """
+        Маска пар, у которых хоть одно вхождение попало в окно отрицания
+
+        Окна сортируются по началу; ключ вхождения покрыт, если он меньше
+        наибольшего конца среди окон, начавшихся не позже него.
+        """
+        negated = np.zeros(n_pairs, dtype=bool)
+        if not window_bounds or not occurrence_keys:
+            return negated
+        bounds = np.array(window_bounds, dtype=np.int64)
+        bounds = bounds[np.argsort(bounds[:, 0], kind='stable')]
+        reach = np.maximum.accumulate(bounds[:, 1])
+        keys = np.array(occurrence_keys, dtype=np.int64)
+        index = np.searchsorted(bounds[:, 0], keys, side='right') - 1
+        covered = (index >= 0) & (keys < reach[np.maximum(index, 0)])
+        negated[np.array(occurrence_pairs, dtype=np.intp)[covered]] = True
+        return negated
+
+    @staticmethod
+    def _find_word(text_lower: str, word: str, start: int) -> int:
+        """Первое вхождение слова целиком начиная с start (-1, если нет)"""
+        is_word = EmotionAnalyzer._is_word_char
+        pos = text_lower.find(word, start)
+        while pos >= 0:
+            end = pos + len(word)
+            if (pos == 0 or not is_word(text_lower[pos - 1])) and \
+                    (end == len(text_lower) or not is_word(text_lower[end])):
+                return pos
+            pos = text_lower.find(word, pos + 1)
+        return -1
+
+    @staticmethod
+    def _normalize(scores: np.ndarray):
+        """Нормализация как в _build_result (сумма модулей в том же порядке)"""
+        total = np.zeros(scores.shape[0])
+        for column in np.abs(scores).T:
+            total = total + column
+        positive = total > 0
+        scores[positive] = np.maximum(scores[positive] / total[positive, None], 0.0)
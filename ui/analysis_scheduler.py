@@ -0,0 +1,136 @@
+"""
+Фоновый анализ текста редактора с debounce
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class AnalysisScheduler:
+    """
+    Планировщик анализа текста при наборе
+
+    Серия нажатий сливается в один запуск: анализ начинается после
+    паузы delay_ms. Текст читается из виджета в потоке UI, анализ
+    выполняется в рабочем потоке, результат возвращается в поток UI
+    через after(). Результаты для устаревшего текста отбрасываются.
+    """
+
+    def __init__(self, widget, analyze: Callable[[str], Dict[str, Any]],
+                 on_result: Callable[[Dict[str, Any]], None],
+                 delay_ms: int = 250, poll_ms: int = 20):
+        """
+        Args:
+            widget: виджет Tk для after()
+            analyze: функция анализа (вызывается в рабочем потоке)
+            on_result: обработчик результата (вызывается в потоке UI)
+            delay_ms: пауза в наборе перед анализом
+            poll_ms: период проверки готовности результата
+        """
+        self.widget = widget
+        self.analyze = analyze
+        self.on_result = on_result
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+
+        # Номер последнего изменения и последнего отправленного запроса
+        self._generation = 0
+        self._submitted = 0
+        self._timer = None
+        self._polling = False
+
+        # Обмен с рабочим потоком: только последний запрос и результат
+        self._condition = threading.Condition()
+        self._request = None
+        self._result = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._work, daemon=True)
+        self._thread.start()
+
+    def schedule(self, get_text: Callable[[], Optional[str]]):
+        """
+        Текст изменился: анализ откладывается до паузы в наборе
+
+        Args:
+            get_text: возвращает текст для анализа или None, если
+                анализировать нечего; вызывается один раз на серию
+        """
+        self._generation += 1
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+        self._timer = self.widget.after(self.delay_ms, lambda: self._submit(get_text))
+
+    def cancel(self):
+        """Отмена ожидающего анализа (например, при загрузке записи)"""
+        self._generation += 1
+        if self._timer is not None:
+            self.widget.after_cancel(self._timer)
+            self._timer = None
+
+    def _submit(self, get_text: Callable[[], Optional[str]]):
+        """Передача текста рабочему потоку (поток UI)"""
+        self._timer = None
+        text = get_text()
+        if text is None:
+            return
+
+        self._submitted = self._generation
+        with self._condition:
+            self._request = (self._generation, text)
+            self._condition.notify()
+
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    def _work(self):
+        """Рабочий поток: анализ последнего запроса"""
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, text = self._request
+                self._request = None
+
+            # Пока ждали, текст мог измениться ещё раз
+            if generation != self._generation:
+                continue
+
+            try:
+                result = self.analyze(text)
+            except Exception:
+                # Живой анализ не должен ронять редактор
+                result = None
+
+            with self._condition:
+                self._result = (generation, result)
+
+    def _poll(self):
+        """Проверка готовности результата (поток UI)"""
+        if self._closed:
+            return
+
+        with self._condition:
+            ready, self._result = self._result, None
+
+        if ready is not None and ready[0] == self._generation:
+            self._polling = False
+            if ready[1] is not None:
+                self.on_result(ready[1])
+            return
+
+        # Ждём, только пока последний запрос ещё актуален
+        if self._submitted == self._generation:
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def close(self):
+        """Остановка рабочего потока"""
+        self.cancel()
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
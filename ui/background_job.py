@@ -0,0 +1,83 @@
+"""
+Фоновые операции приложения (экспорт, пересчёт эмоций)
+"""
+
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class JobCancelled(Exception):
+    """Операция прервана при закрытии приложения"""
+
+
+class BackgroundJob:
+    """
+    Единственная фоновая операция приложения
+
+    Хранится в MainWindow, а не в окне настроек: окно можно закрыть
+    и открыть снова, но новая операция не начнётся, пока идёт
+    предыдущая. Работа выполняется в рабочем потоке и сообщает
+    прогресс через callback(сделано, всего); состояние читается из
+    потока UI опросом. shutdown() прерывает операцию на следующем
+    вызове прогресса и дожидается потока — до закрытия БД.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        # {'kind', 'done', 'total', 'result', 'error', 'finished'}
+        self.state: Optional[Dict[str, Any]] = None
+
+    def running(self) -> bool:
+        """Идёт ли операция"""
+        return self.state is not None and not self.state['finished']
+
+    def start(self, kind: str, work: Callable[[Callable[[int, int], None]], Any]) -> bool:
+        """
+        Запуск операции в рабочем потоке
+
+        Args:
+            kind: вид операции ('export', 'reanalyze')
+            work: функция, принимающая callback прогресса; её результат
+                сохраняется в state['result']
+
+        Returns:
+            False, если уже идёт другая операция
+        """
+        if self.running() or self._cancel.is_set():
+            return False
+
+        state = {'kind': kind, 'done': 0, 'total': 0,
+                 'result': None, 'error': None, 'finished': False}
+        self.state = state
+
+        def on_progress(done: int, total: int):
+            state['done'], state['total'] = done, total
+            if self._cancel.is_set():
+                raise JobCancelled()
+
+        def worker():
+            try:
+                state['result'] = work(on_progress)
+            except Exception as e:
+                state['error'] = e
+            finally:
+                state['finished'] = True
+
+        self._thread = threading.Thread(target=worker, daemon=True)
+        self._thread.start()
+        return True
+
+    def take_finished(self, kind: str) -> Optional[Dict[str, Any]]:
+        """Состояние завершённой операции вида kind (отдаётся один раз)"""
+        state = self.state
+        if state is None or state['kind'] != kind or not state['finished']:
+            return None
+        self.state = None
+        return state
+
+    def shutdown(self, timeout: float = None):
+        """Прерывание операции и ожидание рабочего потока"""
+        self._cancel.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -0,0 +1,243 @@
+"""
+Подсветка эмоциональных слов в редакторе
+"""
+
+import re
+import tkinter
+from bisect import bisect_left
+from typing import Dict, List, Set, Tuple
+
+
+class EmotionHighlighter:
+    """
+    Подсветка найденных анализатором слов тегами текстового виджета
+
+    Слова эмоций окрашиваются цветом эмоции, слова под отрицанием
+    зачёркиваются, интенсификаторы подчёркиваются, отрицания
+    приглушаются. Теги обновляются инкрементально: текст сравнивается
+    с предыдущим, теги вне изменённого участка Tk уже сдвинул сам при
+    правке, поэтому заново расставляются только теги в изменённом
+    участке и разница между старыми и новыми позициями.
+
+    Правку, после которой текст не изменился (стёрли букву и набрали
+    её снова), сравнение не видит, а теги на набранных символах Tk уже
+    потерял. Поэтому при каждом нажатии окрестность курсора помечается
+    служебным тегом (mark_edit) — он сдвигается вместе с текстом, и
+    помеченные участки тоже расставляются заново.
+    """
+
+    NEGATED_TAG = "emotion_negated"
+    INTENSIFIER_TAG = "intensifier"
+    NEGATION_TAG = "negation"
+    DIRTY_TAG = "highlight_dirty"
+
+    # Окрестность курсора, помечаемая при нажатии (символов в каждую сторону)
+    EDIT_MARGIN = 16
+
+    LINE_END_RE = re.compile(r'\n')
+
+    # Tcl до 8.7 считает символы вне BMP (эмодзи) за два
+    _WIDE_ASTRAL = tkinter.TclVersion < 8.7
+
+    def __init__(self, textbox, colors: Dict[str, str], muted_color: str):
+        """
+        Args:
+            textbox: текстовый виджет (CTkTextbox или tkinter.Text)
+            colors: эмоция → цвет
+            muted_color: цвет отрицаний
+        """
+        self.textbox = textbox
+        self.tags = [self.emotion_tag(emotion) for emotion in colors]
+        self.tags += [self.NEGATED_TAG, self.INTENSIFIER_TAG, self.NEGATION_TAG]
+
+        for emotion, color in colors.items():
+            textbox.tag_config(self.emotion_tag(emotion), foreground=color)
+        textbox.tag_config(self.NEGATED_TAG, overstrike=True)
+        textbox.tag_config(self.INTENSIFIER_TAG, underline=True)
+        textbox.tag_config(self.NEGATION_TAG, foreground=muted_color)
+
+        # Текст, для которого расставлены теги, и сами теги
+        self._text = ""
+        self._applied: Set[Tuple[int, int, str]] = set()
+        self._astral: List[int] = []
+
+    @staticmethod
+    def emotion_tag(emotion: str) -> str:
+        """Имя тега эмоции"""
+        return f"emotion_{emotion}"
+
+    def mark_edit(self):
+        """Пометка окрестности курсора после нажатия клавиши"""
+        self.textbox.tag_add(
+            self.DIRTY_TAG, f"insert-{self.EDIT_MARGIN}c", f"insert+{self.EDIT_MARGIN}c"
+        )
+
+    def apply(self, text: str, spans: List[Dict], offset: int = 0):
+        """
+        Подсветка по результату analyze(..., spans=True)
+
+        Args:
+            text: текущий текст виджета целиком
+            spans: позиции из результата анализа
+            offset: позиция в text, с которой начинается
+                проанализированный текст (например, после strip())
+        """
+        wanted = self._span_tags(spans, offset, len(text))
+        old_text = self._text
+        self._set_text(text)
+
+        regions = self._dirty_regions(text)
+        self.textbox.tag_remove(self.DIRTY_TAG, "1.0", "end")
+        if old_text == text:
+            current = self._applied
+        else:
+            current, region = self._surviving(old_text, text)
+            regions.append(region)
+
+        # Изменённые участки: старые теги в них непредсказуемы
+        stale = set()
+        for start, end in regions:
+            if start >= end:
+                continue
+            start_index, end_index = self._index(start), self._index(end)
+            for tag in self.tags:
+                self.textbox.tag_remove(tag, start_index, end_index)
+            # Задетые снятием теги остались кусками — снимаются целиком
+            stale.update(span for span in current if span[0] < end and span[1] > start)
+        current = current - stale
+
+        for start, end, tag in (current | stale) - wanted:
+            self.textbox.tag_remove(tag, self._index(start), self._index(end))
+        for start, end, tag in wanted - current:
+            self.textbox.tag_add(tag, self._index(start), self._index(end))
+        self._applied = wanted
+
+    def reset(self):
+        """Снятие подсветки (например, при загрузке другой записи)"""
+        for tag in self.tags + [self.DIRTY_TAG]:
+            self.textbox.tag_remove(tag, "1.0", "end")
+        self._text = ""
+        self._applied = set()
+        self._astral = []
+
+    def _span_tags(self, spans: List[Dict], offset: int, length: int) -> Set[Tuple[int, int, str]]:
+        """Позиции в виде (начало, конец, тег) в координатах виджета"""
+        tags = set()
+        for span in spans:
+            start, end = offset + span['start'], offset + span['end']
+            if end > length:
+                continue
+            if span['kind'] == 'emotion':
+                tags.add((start, end, self.emotion_tag(span['emotion'])))
+                if span['negated']:
+                    tags.add((start, end, self.NEGATED_TAG))
+            elif span['kind'] == 'intensifier':
+                tags.add((start, end, self.INTENSIFIER_TAG))
+            else:
+                tags.add((start, end, self.NEGATION_TAG))
+        return tags
+
+    def _surviving(self, old: str, new: str) -> Tuple[Set[Tuple[int, int, str]], Tuple[int, int]]:
+        """
+        Теги, которые правка old → new не затронула, в новых координатах,
+        и участок (начало, конец), где теги надо снять
+
+        Правка считается одной заменой участка. Если её место
+        неоднозначно ('aa' → 'aaa'), участок берётся с запасом.
+        """
+        prefix = self._common_prefix(old, new)
+        suffix = self._common_suffix(old, new)
+        shortest = min(len(old), len(new))
+        # Самое левое возможное начало правки и самые правые её концы
+        edit_start = max(0, shortest - suffix)
+        suffix = min(suffix, shortest - prefix)
+        old_end = len(old) - suffix
+        new_end = len(new) - suffix
+        delta = len(new) - len(old)
+
+        clear_start = min(edit_start, prefix)
+        clear_end = new_end
+        survived = set()
+        touched = []
+        for start, end, tag in self._applied:
+            if end <= clear_start:
+                survived.add((start, end, tag))
+            elif start >= old_end:
+                survived.add((start + delta, end + delta, tag))
+            else:
+                touched.append((start, end))
+
+        for start, end in touched:
+            clear_start = min(clear_start, start)
+            clear_end = max(clear_end, min(len(new), end + max(delta, 0)))
+        return survived, (clear_start, clear_end)
+
+    def _dirty_regions(self, text: str) -> List[Tuple[int, int]]:
+        """Участки, помеченные mark_edit, в позициях текста"""
+        ranges = [str(index) for index in self.textbox.tag_ranges(self.DIRTY_TAG)]
+        if not ranges:
+            return []
+
+        # Индекс Tk 'строка.столбец' → позиция символа
+        line_starts = [0] + [m.end() for m in self.LINE_END_RE.finditer(text)]
+        positions = []
+        for index in ranges:
+            line, column = map(int, index.split("."))
+            line_start = line_starts[min(line, len(line_starts)) - 1]
+            positions.append(self._position(self._tk_offset(line_start) + column))
+        return list(zip(positions[::2], positions[1::2]))
+
+    @staticmethod
+    def _common_prefix(a: str, b: str) -> int:
+        """Длина общего начала (двоичный поиск по срезам)"""
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if a[:middle] == b[:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    @staticmethod
+    def _common_suffix(a: str, b: str) -> int:
+        """Длина общего конца (двоичный поиск по срезам)"""
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if a[len(a) - middle:] == b[len(b) - middle:]:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _set_text(self, text: str):
+        """Запоминание текста и позиций символов вне BMP"""
+        self._text = text
+        if self._WIDE_ASTRAL and text and max(text) > '\uffff':
+            self._astral = [i for i, ch in enumerate(text) if ch > '\uffff']
+        else:
+            self._astral = []
+
+    def _tk_offset(self, pos: int) -> int:
+        """Смещение Tk для позиции символа в тексте"""
+        if self._astral:
+            pos += bisect_left(self._astral, pos)
+        return pos
+
+    def _position(self, tk_offset: int) -> int:
+        """Позиция символа по смещению Tk (обратное к _tk_offset)"""
+        if not self._astral:
+            return min(tk_offset, len(self._text))
+        low, high = 0, len(self._text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._tk_offset(middle) <= tk_offset:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def _index(self, pos: int) -> str:
+        """Индекс Tk для позиции символа в тексте"""
+        return f"1.0+{self._tk_offset(pos)}c"
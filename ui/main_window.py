@@ -2,25 +2,32 @@
 Главное окно приложения MoodJournal
 """
 
+import threading
 import customtkinter as ctk
 from tkinter import messagebox
 from datetime import datetime, date, timedelta
-from typing import Optional
+from typing import Optional, Dict
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from src.database import Database
-from src.emotion_analyzer import EmotionAnalyzer
+from src.emotion_analyzer import EmotionAnalyzer, IncrementalAnalyzer
 from src.charts import ChartGenerator
 from src.utils import (
     format_date, format_time, parse_tags, tags_to_string,
     get_greeting, get_mood_phrase, truncate_text, get_date_range
 )
+from ui.analysis_scheduler import AnalysisScheduler
+from ui.background_job import BackgroundJob
+from ui.emotion_highlighter import EmotionHighlighter
 
 
 class MainWindow(ctk.CTk):
     """Главное окно приложения"""
 
+    # Пауза в наборе перед анализом, если настройка некорректна
+    ANALYSIS_DELAY_MS = 250
+
     # Цвета темы
     COLORS = {
         'bg_dark': '#1a1a2e',
@@ -46,6 +53,22 @@ class MainWindow(ctk.CTk):
         self.analyzer = analyzer
         self.charts = charts
 
+        # Анализ при наборе: пересчитываются только изменённые предложения,
+        # в фоновом потоке после паузы в наборе
+        self.live_analyzer = IncrementalAnalyzer(analyzer, spans=True)
+        self.analysis_scheduler = AnalysisScheduler(
+            self,
+            self._analyze_live,
+            self._show_live_analysis,
+            delay_ms=self._analysis_delay_ms()
+        )
+        # Последний результат живого анализа: сохранение того же текста
+        # обходится без анализа в потоке UI
+        self._live_result: Optional[Dict] = None
+        self._saving = False
+        # Экспорт или пересчёт: одна операция на приложение
+        self.background_job = BackgroundJob()
+
         # Настройка окна
         self.title("📔 MoodJournal — Дневник настроения")
         self.geometry("1200x800")
@@ -65,6 +88,25 @@ class MainWindow(ctk.CTk):
         self._load_entries()
         self._update_stats()
 
+        # Тема применяется при любом сохранении настройки
+        self.db.add_setting_listener(self._on_theme_setting, "theme")
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _analysis_delay_ms(self) -> int:
+        """Пауза перед анализом из настроек (некорректное значение — по умолчанию)"""
+        try:
+            delay = int(self.db.get_setting("analysis_delay_ms", str(self.ANALYSIS_DELAY_MS)))
+        except (TypeError, ValueError):
+            return self.ANALYSIS_DELAY_MS
+        return delay if delay >= 0 else self.ANALYSIS_DELAY_MS
+
+    def _on_close(self):
+        """Закрытие окна: фоновые потоки завершаются до закрытия БД"""
+        self.analysis_scheduler.close()
+        self.background_job.shutdown()
+        self.destroy()
+
     def _create_ui(self):
         """Создание пользовательского интерфейса"""
         # Главный контейнер
@@ -325,6 +367,13 @@ class MainWindow(ctk.CTk):
         self.text_editor.bind("<FocusOut>", self._on_text_focus_out)
         self.text_editor.bind("<KeyRelease>", self._on_text_change)
 
+        # Подсветка эмоциональных слов по результату живого анализа
+        self.highlighter = EmotionHighlighter(
+            self.text_editor,
+            {emotion: self.COLORS[emotion] for emotion in self.analyzer.get_all_emotions()},
+            self.COLORS['text_secondary']
+        )
+
         # === Нижняя панель ===
         bottom_frame = ctk.CTkFrame(editor_frame, fg_color="transparent")
         bottom_frame.grid(row=1, column=0, sticky="ew", padx=15, pady=(0, 15))
@@ -501,16 +550,35 @@ class MainWindow(ctk.CTk):
             self.text_editor.configure(text_color=self.COLORS['text_secondary'])
 
     def _on_text_change(self, event):
-        """Изменение текста — анализ эмоций"""
+        """Изменение текста — анализ эмоций после паузы в наборе"""
+        self.highlighter.mark_edit()
+        self.analysis_scheduler.schedule(self._get_text_for_analysis)
+
+    def _get_text_for_analysis(self) -> Optional[str]:
+        """Текст редактора для анализа (None — placeholder или пусто)"""
         text = self.text_editor.get("1.0", "end-1c")
 
         if text == self.placeholder_text or not text.strip():
-            return
+            return None
+        # Как при сохранении — тогда _save_entry возьмёт результат из кэша
+        return text.strip()
+
+    def _analyze_live(self, text: str) -> Dict:
+        """Анализ при наборе (рабочий поток): результат помнит свой текст"""
+        result = self.live_analyzer.analyze(text)
+        result['text'] = text
+        return result
 
-        # Анализ эмоций
-        result = self.analyzer.analyze(text)
+    def _show_live_analysis(self, result: Dict):
+        """Отображение результата фонового анализа"""
+        self._live_result = result
+
+        # Подсветка — только если текст с тех пор не менялся
+        text = self.text_editor.get("1.0", "end-1c")
+        if text.strip() == result['text']:
+            offset = len(text) - len(text.lstrip())
+            self.highlighter.apply(text, result['spans'], offset)
 
-        # Обновляем UI
         emotion_name = EmotionAnalyzer.emotion_to_russian(result['emotion'])
 
         self.emotion_emoji_label.configure(text=result['emoji'])
@@ -556,8 +624,8 @@ class MainWindow(ctk.CTk):
         for widget in self.entries_list_frame.winfo_children():
             widget.destroy()
 
-        # Получаем записи
-        entries = self.db.get_entries_by_date(self.selected_date)
+        # Получаем записи (без полного текста — он грузится при выборе)
+        entries = self.db.get_previews_by_date(self.selected_date, 80)
         self.entries_count_label.configure(text=str(len(entries)))
 
         if not entries:
@@ -611,7 +679,7 @@ class MainWindow(ctk.CTk):
         ).pack(side="right")
 
         # Превью текста
-        preview = truncate_text(entry['content'], 80)
+        preview = truncate_text(entry['preview'], 80)
         ctk.CTkLabel(
             content,
             text=preview,
@@ -650,6 +718,8 @@ class MainWindow(ctk.CTk):
             return
 
         self.current_entry_id = entry_id
+        self.analysis_scheduler.cancel()
+        self.highlighter.reset()
 
         # Заполняем редактор
         self.text_editor.delete("1.0", "end")
@@ -679,9 +749,14 @@ class MainWindow(ctk.CTk):
             text=get_mood_phrase(entry['emotion'], entry['emotion_score'])
         )
 
+        # Подсветка слов загруженной записи
+        self.analysis_scheduler.schedule(self._get_text_for_analysis)
+
     def _new_entry(self):
         """Создание новой записи"""
         self.current_entry_id = None
+        self.analysis_scheduler.cancel()
+        self.highlighter.reset()
 
         # Очищаем редактор
         self.text_editor.delete("1.0", "end")
@@ -708,33 +783,77 @@ class MainWindow(ctk.CTk):
         if not text or text == self.placeholder_text:
             messagebox.showwarning("Внимание", "Напишите что-нибудь перед сохранением!")
             return
-
-        # Анализ эмоций
-        result = self.analyzer.analyze(text)
+        if self._saving:
+            return
 
         # Теги
         tags_text = self.tags_entry.get().strip()
         tags = parse_tags(tags_text)
 
-        if self.current_entry_id:
+        # Запись и день — на момент нажатия, анализ может занять время
+        entry_id, entry_date = self.current_entry_id, self.selected_date
+
+        # Обычно текст уже проанализирован планировщиком при наборе
+        result = self._live_result
+        if result is not None and result['text'] == text and \
+                result['version'] == self.analyzer.version:
+            self._store_entry(entry_id, entry_date, text, tags, result)
+            return
+
+        # Иначе анализ эмоций в рабочем потоке, запись — в потоке UI
+        self._saving = True
+        outcome = {}
+
+        def worker():
+            try:
+                outcome['result'] = self.analyzer.analyze(text)
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        self._poll_save(thread, outcome, entry_id, entry_date, text, tags)
+
+    def _poll_save(self, thread: threading.Thread, outcome: Dict, entry_id: Optional[int],
+                   entry_date: date, text: str, tags: list):
+        """Ожидание анализа сохраняемого текста (поток UI)"""
+        if thread.is_alive():
+            self.after(20, lambda: self._poll_save(thread, outcome, entry_id, entry_date, text, tags))
+            return
+
+        self._saving = False
+        if 'error' in outcome:
+            messagebox.showerror("Ошибка", str(outcome['error']))
+            return
+        self._store_entry(entry_id, entry_date, text, tags, outcome['result'])
+
+    def _store_entry(self, entry_id: Optional[int], entry_date: date, text: str,
+                     tags: list, result: Dict):
+        """Запись оценённого текста в БД"""
+        if entry_id:
             # Обновление существующей записи
             self.db.update_entry(
-                self.current_entry_id,
+                entry_id,
                 content=text,
                 emotion=result['emotion'],
                 emotion_score=result['score'],
-                tags=tags
+                tags=tags,
+                analyzer_version=result['version']
             )
             message = "Запись обновлена! ✅"
         else:
             # Создание новой записи
-            self.current_entry_id = self.db.add_entry(
+            new_id = self.db.add_entry(
                 content=text,
                 emotion=result['emotion'],
                 emotion_score=result['score'],
                 tags=tags,
-                entry_date=self.selected_date
+                entry_date=entry_date,
+                analyzer_version=result['version']
             )
+            # Пока шёл анализ, могли открыть другую запись
+            if self.current_entry_id is None:
+                self.current_entry_id = new_id
             message = "Запись сохранена! ✅"
 
         # Показываем уведомление
@@ -806,19 +925,7 @@ class MainWindow(ctk.CTk):
 
     def _calculate_streak(self) -> int:
         """Расчёт серии дней с записями"""
-        today = date.today()
-        streak = 0
-
-        for i in range(365):
-            check_date = today - timedelta(days=i)
-            entries = self.db.get_entries_by_date(check_date)
-
-            if entries:
-                streak += 1
-            elif i > 0:
-                break
-
-        return streak
+        return self.db.get_streaks()['current']
 
     def _update_charts(self, start_date: date, end_date: date, emotion_stats: dict):
         """Обновление графиков"""
@@ -906,11 +1013,13 @@ class MainWindow(ctk.CTk):
 
     def _open_settings(self):
         """Открытие настроек"""
-        SettingsWindow(
-            self,
-            self.db,
-            on_theme_change=self._on_theme_change
-        )
+        SettingsWindow(self, self.db, self.analyzer, self.background_job,
+                       on_theme_change=self._on_theme_change)
+
+    def _on_theme_setting(self, key: str, theme: str):
+        """Изменилась настройка темы"""
+        ctk.set_appearance_mode(theme)
+        self._on_theme_change(theme)
 
     def _on_theme_change(self, theme: str):
         """Обработка смены темы"""
@@ -989,7 +1098,7 @@ class SearchWindow(ctk.CTkToplevel):
 
     def _show_recent(self):
         """Показать последние записи"""
-        entries = self.db.get_all_entries(limit=20)
+        entries = self.db.get_recent_previews(limit=20)
         self._display_results(entries)
 
     def _search(self):
@@ -1000,7 +1109,7 @@ class SearchWindow(ctk.CTkToplevel):
             self._show_recent()
             return
 
-        entries = self.db.search_entries(query)
+        entries = self.db.search_previews(query)
         self._display_results(entries)
 
     def _display_results(self, entries: list):
@@ -1058,7 +1167,7 @@ class SearchWindow(ctk.CTkToplevel):
         ).pack(side="right")
 
         # Текст
-        preview = truncate_text(entry['content'], 150)
+        preview = truncate_text(entry['preview'], 150)
         ctk.CTkLabel(
             content,
             text=preview,
@@ -1310,21 +1419,31 @@ class SettingsWindow(ctk.CTkToplevel):
         'success': '#4ECDC4',
     }
 
-    def __init__(self, parent, db, on_theme_change=None):
+    def __init__(self, parent, db, analyzer, job: BackgroundJob, on_theme_change=None):
         super().__init__(parent)
 
         self.db = db
+        self.analyzer = analyzer
+        # Фоновая операция живёт в MainWindow и переживает это окно
+        self.job = job
         self.on_theme_change = on_theme_change
 
+        # Изменённые настройки: сохраняются одной транзакцией при закрытии
+        self._pending_settings = {}
+
         self.title("⚙️ Настройки")
-        self.geometry("450x500")
+        self.geometry("450x660")
         self.resizable(False, False)
         self.configure(fg_color=self.COLORS['bg_dark'])
 
         self.transient(parent)
         self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self._close)
 
         self._create_ui()
+        # Операция могла начаться в прошлый раз, пока окно было открыто
+        self._poll_export()
+        self._poll_reanalyze()
 
     def _create_ui(self):
         """Создание интерфейса"""
@@ -1348,7 +1467,10 @@ class SettingsWindow(ctk.CTkToplevel):
             font=ctk.CTkFont(size=14)
         ).pack(side="left")
 
-        self.theme_var = ctk.StringVar(value="Тёмная")
+        theme_names = {"dark": "Тёмная", "light": "Светлая", "system": "Системная"}
+        self.theme_var = ctk.StringVar(
+            value=theme_names.get(self.db.get_setting("theme", "dark"), "Тёмная")
+        )
         ctk.CTkOptionMenu(
             theme_content,
             values=["Тёмная", "Светлая", "Системная"],
@@ -1358,6 +1480,32 @@ class SettingsWindow(ctk.CTkToplevel):
             command=self._change_theme
         ).pack(side="right")
 
+        # Надёжность записи
+        durability_frame = ctk.CTkFrame(self, fg_color=self.COLORS['bg_card'], corner_radius=10)
+        durability_frame.pack(fill="x", padx=20, pady=10)
+
+        durability_content = ctk.CTkFrame(durability_frame, fg_color="transparent")
+        durability_content.pack(fill="x", padx=15, pady=15)
+
+        ctk.CTkLabel(
+            durability_content,
+            text="💽 Сохранение записей",
+            font=ctk.CTkFont(size=14)
+        ).pack(side="left")
+
+        durability_names = {"full": "Надёжное", "normal": "Быстрое", "batched": "Пакетное"}
+        self.durability_var = ctk.StringVar(
+            value=durability_names.get(self.db.get_setting("durability", "full"), "Надёжное")
+        )
+        ctk.CTkOptionMenu(
+            durability_content,
+            values=["Надёжное", "Быстрое", "Пакетное"],
+            variable=self.durability_var,
+            width=150,
+            fg_color=self.COLORS['bg_input'],
+            command=self._change_durability
+        ).pack(side="right")
+
         # Экспорт
         export_frame = ctk.CTkFrame(self, fg_color=self.COLORS['bg_card'], corner_radius=10)
         export_frame.pack(fill="x", padx=20, pady=10)
@@ -1371,13 +1519,36 @@ class SettingsWindow(ctk.CTkToplevel):
             font=ctk.CTkFont(size=14)
         ).pack(side="left")
 
-        ctk.CTkButton(
+        self.export_button = ctk.CTkButton(
             export_content,
             text="📤 Экспорт JSON",
             width=130,
             fg_color=self.COLORS['accent'],
             command=self._export_data
-        ).pack(side="right")
+        )
+        self.export_button.pack(side="right")
+
+        # Пересчёт эмоций
+        reanalyze_frame = ctk.CTkFrame(self, fg_color=self.COLORS['bg_card'], corner_radius=10)
+        reanalyze_frame.pack(fill="x", padx=20, pady=10)
+
+        reanalyze_content = ctk.CTkFrame(reanalyze_frame, fg_color="transparent")
+        reanalyze_content.pack(fill="x", padx=15, pady=15)
+
+        ctk.CTkLabel(
+            reanalyze_content,
+            text="🧠 Пересчитать эмоции",
+            font=ctk.CTkFont(size=14)
+        ).pack(side="left")
+
+        self.reanalyze_button = ctk.CTkButton(
+            reanalyze_content,
+            text="🔄 Пересчитать",
+            width=130,
+            fg_color=self.COLORS['bg_input'],
+            command=self._reanalyze
+        )
+        self.reanalyze_button.pack(side="right")
 
         # Очистка
         clear_frame = ctk.CTkFrame(self, fg_color=self.COLORS['bg_card'], corner_radius=10)
@@ -1420,35 +1591,118 @@ class SettingsWindow(ctk.CTkToplevel):
             height=40,
             font=ctk.CTkFont(size=14, weight="bold"),
             fg_color=self.COLORS['success'],
-            command=self.destroy
+            command=self._close
         ).pack(fill="x", padx=20, pady=20)
 
     def _change_theme(self, value: str):
         theme_map = {"Тёмная": "dark", "Светлая": "light", "Системная": "system"}
         theme = theme_map.get(value, "dark")
+        self._pending_settings["theme"] = theme
+        # Предпросмотр сразу, сохранение — при закрытии окна
         ctk.set_appearance_mode(theme)
         if self.on_theme_change:
             self.on_theme_change(theme)
 
+    def _change_durability(self, value: str):
+        durability_map = {"Надёжное": "full", "Быстрое": "normal", "Пакетное": "batched"}
+        self._pending_settings["durability"] = durability_map.get(value, "full")
+
+    def _close(self):
+        """Сохранение изменённых настроек и закрытие окна"""
+        # Применяют слушатели настроек в MainWindow и MoodJournalApp
+        self.db.set_settings(self._pending_settings)
+        self.destroy()
+
     def _export_data(self):
         from tkinter import filedialog
+        if self.job.running():
+            messagebox.showinfo("Подождите", "Дождитесь окончания текущей операции")
+            return
+
         filepath = filedialog.asksaveasfilename(
             defaultextension=".json",
-            filetypes=[("JSON files", "*.json")],
+            filetypes=[
+                ("JSON files", "*.json"),
+                ("NDJSON files", "*.ndjson"),
+                ("JSON + gzip", "*.json.gz"),
+                ("NDJSON + gzip", "*.ndjson.gz")
+            ],
             title="Сохранить данные"
         )
-        if filepath:
-            try:
-                self.db.export_to_json(filepath)
-                messagebox.showinfo("Успех", f"Данные экспортированы!")
-            except Exception as e:
-                messagebox.showerror("Ошибка", str(e))
+        if not filepath:
+            return
+
+        fmt = "ndjson" if ".ndjson" in filepath else "json"
+        started = self.job.start(
+            "export",
+            lambda on_progress: self.db.export_entries(filepath, fmt=fmt, on_progress=on_progress)
+        )
+        if started:
+            self._poll_export()
+
+    def _poll_export(self):
+        if not self.winfo_exists():
+            return
+
+        state = self.job.state
+        if state is not None and state['kind'] == "export" and not state['finished']:
+            text = f"⏳ {state['done'] * 100 // state['total']}%" if state['total'] else "⏳ 0%"
+            self.export_button.configure(text=text, state="disabled")
+            self.after(100, self._poll_export)
+            return
+
+        self.export_button.configure(text="📤 Экспорт JSON", state="normal")
+        state = self.job.take_finished("export")
+        if state is None:
+            return
+        if state['error']:
+            messagebox.showerror("Ошибка", str(state['error']))
+        else:
+            messagebox.showinfo("Успех", f"Данные экспортированы!")
+
+    def _reanalyze(self):
+        if self.job.running():
+            messagebox.showinfo("Подождите", "Дождитесь окончания текущей операции")
+            return
+
+        started = self.job.start(
+            "reanalyze",
+            lambda on_progress: self.db.reanalyze_entries(self.analyzer, on_progress=on_progress)
+        )
+        if started:
+            self._poll_reanalyze()
+
+    def _poll_reanalyze(self):
+        if not self.winfo_exists():
+            return
+
+        state = self.job.state
+        if state is not None and state['kind'] == "reanalyze" and not state['finished']:
+            text = f"⏳ {state['done'] * 100 // state['total']}%" if state['total'] else "⏳ 0%"
+            self.reanalyze_button.configure(text=text, state="disabled")
+            self.after(100, self._poll_reanalyze)
+            return
+
+        self.reanalyze_button.configure(text="🔄 Пересчитать", state="normal")
+        state = self.job.take_finished("reanalyze")
+        if state is None:
+            return
+        if state['error']:
+            messagebox.showerror("Ошибка", str(state['error']))
+        else:
+            messagebox.showinfo(
+                "Готово",
+                f"Обработано записей: {state['result']['processed']}\n"
+                f"Изменено: {state['result']['updated']}"
+            )
 
     def _clear_data(self):
+        if self.job.running():
+            messagebox.showinfo("Подождите", "Дождитесь окончания текущей операции")
+            return
         if messagebox.askyesno("⚠️ Внимание", "Удалить ВСЕ записи?"):
             try:
-                self.db.cursor.execute("DELETE FROM entries")
-                self.db.connection.commit()
+                self.db.clear_entries()
                 messagebox.showinfo("Готово", "Все записи удалены")
             except Exception as e:
                 messagebox.showerror("Ошибка", str(e))
\ No newline at end of file
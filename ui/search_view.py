@@ -117,7 +117,7 @@ class SearchWindow(ctk.CTkToplevel):
 
     def _show_recent(self):
         """Показать последние записи"""
-        entries = self.db.get_all_entries(limit=20)
+        entries = self.db.get_recent_previews(limit=20)
         self._display_results(entries, "Последние записи")
 
     def _search(self):
@@ -128,18 +128,14 @@ class SearchWindow(ctk.CTkToplevel):
             self._show_recent()
             return
 
-        entries = self.db.search_entries(query)
-
         # Фильтр по эмоции
-        emotion_filter = self.emotion_filter.get()
-        if emotion_filter != "Все":
-            emotion_map = {
-                "Радость": "joy", "Грусть": "sadness", "Гнев": "anger",
-                "Страх": "fear", "Удивление": "surprise", "Спокойствие": "calm"
-            }
-            emotion = emotion_map.get(emotion_filter)
-            if emotion:
-                entries = [e for e in entries if e['emotion'] == emotion]
+        emotion_map = {
+            "Радость": "joy", "Грусть": "sadness", "Гнев": "anger",
+            "Страх": "fear", "Удивление": "surprise", "Спокойствие": "calm"
+        }
+        emotion = emotion_map.get(self.emotion_filter.get())
+
+        entries = self.db.search_previews(query, emotion=emotion)
 
         self._display_results(entries, f"Результаты для: {query}")
 
@@ -201,7 +197,7 @@ class SearchWindow(ctk.CTkToplevel):
         ).pack(side="right")
 
         # Текст
-        preview = truncate_text(entry['content'], 150)
+        preview = truncate_text(entry['preview'], 150)
         ctk.CTkLabel(
             content,
             text=preview,
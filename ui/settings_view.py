@@ -301,8 +301,7 @@ class SettingsWindow(ctk.CTkToplevel):
         ):
             if messagebox.askyesno("Последнее предупреждение", "Точно удалить?"):
                 try:
-                    self.db.cursor.execute("DELETE FROM entries")
-                    self.db.connection.commit()
+                    self.db.clear_entries()
                     messagebox.showinfo("Готово", "Все записи удалены")
                 except Exception as e:
                     messagebox.showerror("Ошибка", f"Не удалось очистить:\n{e}")